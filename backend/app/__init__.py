@@ -1,9 +1,50 @@
 # app/__init__.py
+import asyncio
 import logging
+import os
+from contextlib import asynccontextmanager
+import httpx
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+from .config import HTTP_TIMEOUTS
+from .db import Base, SessionLocal, engine
+from .middleware import CORSWildcardASGI
+from .models import rebuild_all as _rebuild_api_models
 from .routes import router as core_router
-from .routes_data import router as data_router  # make sure this import works
+
+POOL_WARMUP_CONNECTIONS = 20  # matches the engine's pool_size
+
+async def _prime_connection() -> None:
+    async with SessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # build the deferred pydantic schemas off the event loop so the first
+    # request doesn't pay for them
+    await asyncio.to_thread(_rebuild_api_models)
+    # create_all can't run at import time against the async engine. It also
+    # costs one information_schema probe per table per worker on every boot,
+    # so deployments with a settled schema can turn it off with INIT_DB=0.
+    if os.environ.get("INIT_DB", "1") not in ("0", "false", "no"):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    # Open the whole pool concurrently at boot so the first burst of
+    # traffic doesn't pay one Neon TLS handshake per request.
+    try:
+        await asyncio.gather(*(_prime_connection() for _ in range(POOL_WARMUP_CONNECTIONS)))
+    except Exception:
+        logging.getLogger(__name__).exception("DB pool warmup failed; continuing")
+    # One shared outbound HTTP client so webhook and auto-ingest calls
+    # reuse warm connections instead of redoing a TLS handshake per call.
+    app.state.http = httpx.AsyncClient(
+        timeout=httpx.Timeout(HTTP_TIMEOUTS["default"], connect=HTTP_TIMEOUTS["connect"]),
+        limits=httpx.Limits(max_connections=1000, max_keepalive_connections=100),
+    )
+    yield
+    await app.state.http.aclose()
+    await engine.dispose()
 
 def create_app() -> FastAPI:
     # show our custom logs + uvicorn logs
@@ -15,13 +56,19 @@ def create_app() -> FastAPI:
         logging.getLogger(name).setLevel(logging.INFO)
     logging.getLogger("ingest").setLevel(logging.INFO)  # our routes_data logger
 
-    app = FastAPI(title="Techolution", version="1.0.0")
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_methods=["*"],
-        allow_headers=["*"],
+    app = FastAPI(
+        title="Techolution",
+        version="1.0.0",
+        lifespan=_lifespan,
+        # orjson serializes message/summary lists severalfold faster than
+        # the stdlib encoder and emits bytes directly
+        default_response_class=ORJSONResponse,
     )
+    app.add_middleware(CORSWildcardASGI)
+    # Imported here (not at module top) so that pulling in the ingestion
+    # stack — pandas, openpyxl, etc. — doesn't inflate worker cold-start.
+    from .routes_data import router as data_router
+
     app.include_router(core_router)
     app.include_router(data_router)
     return app
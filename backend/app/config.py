@@ -1,5 +1,6 @@
 import os
 import re
+import types
 from pathlib import Path
 
 CHAT_DATA_DIR = Path(os.environ.get("CHAT_DATA_DIR", "./data")).resolve()
@@ -10,11 +11,51 @@ CONV_DIR.mkdir(parents=True, exist_ok=True)
 UPLOADS_DIR = CHAT_DATA_DIR / "uploads"
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 
-# UUID hex (32 chars, no dashes)
-ID_RE = re.compile(r"^[0-9a-fA-F]{32}$")
+# UUID hex (32 chars, no dashes). re.ASCII keeps the engine off the
+# unicode tables — these tokens are ASCII by definition.
+ID_RE = re.compile(r"^[0-9a-fA-F]{32}$", re.ASCII)
+
+def valid_cid(cid: str) -> bool:
+    """Same semantics as ID_RE but without the regex engine: a length check
+    plus bytes.fromhex (a tight C loop) — called on every conversation-scoped
+    request. bytes.fromhex skips ASCII whitespace, so isalnum() rejects
+    those first; otherwise ids like "aabb...cc  aabb..." would slip through
+    and mint whitespace-named paths."""
+    if len(cid) != 32 or not cid.isalnum():
+        return False
+    try:
+        bytes.fromhex(cid)
+        return True
+    except ValueError:
+        return False
 # User id: safe token (alnum, underscore, dash)
-USER_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+USER_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$", re.ASCII)
 # Safe filename sanitizer (keep alnum, dot, dash, underscore)
-SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9._-]+")
+SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9._-]+", re.ASCII)
 
 DEFAULT_USER = "default"
+
+# Streaming chunk size for file uploads (bytes)
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Seconds an AI answer may be served from the in-process cache before the
+# same question goes back to the webhook
+ANSWER_CACHE_TTL = 3600
+
+# Max concurrent auto-ingest calls per upload batch; keeps a big multi-file
+# upload from monopolizing the DB pool and the outbound client
+AUTO_INGEST_CONCURRENCY = 8
+
+# Outbound HTTP timeouts (seconds) for the shared client in app.state.http
+HTTP_TIMEOUTS = {
+    "connect": 5.0,
+    "default": 30.0,
+}
+
+# Demo credential table. Read-only view so route modules can't drift by
+# mutating (or shadowing) their own copy of the user set.
+USERS = types.MappingProxyType({
+    "admin": "secret",
+    "demo": "demo",
+    "hello": "pass123",
+})
@@ -1,8 +1,8 @@
 # app/db.py
 import os
-from urllib.parse import urlparse
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from urllib.parse import urlparse, urlsplit, urlunsplit
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 
 try:
     from dotenv import load_dotenv
@@ -19,18 +19,55 @@ DATABASE_URL = os.getenv("DATABASE_URL", NEON_URL)
 
 ECHO = os.getenv("SQLALCHEMY_ECHO", "0").lower() in ("1", "true", "yes")
 
+
+def _async_url(url: str) -> str:
+    """Rewrite a libpq-style URL for the asyncpg driver.
+
+    asyncpg rejects libpq query options (sslmode, channel_binding), so the
+    query string is dropped; TLS is requested via connect_args instead.
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme
+    if scheme.startswith("postgresql") and "+" not in scheme:
+        scheme = "postgresql+asyncpg"
+    return urlunsplit((scheme, parts.netloc, parts.path, "", ""))
+
+
 parts = urlparse(DATABASE_URL)
 host = parts.hostname or ""
 port = f":{parts.port}" if parts.port else ""
 print(f"[DB] Connecting to: {parts.scheme}://{parts.username or '***'}:***@{host}{port}{parts.path} (echo={ECHO})")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, future=True, echo=ECHO)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+# Neon is remote (ap-southeast-1) and every cold acquire pays a TCP+TLS
+# handshake, so keep a generous warm pool and recycle before Neon's idle
+# timeout kicks in. Statement caches are disabled because the pooler runs
+# in transaction mode, where server-side prepared statements break.
+#
+# pre-ping would add a SELECT 1 round-trip to Neon on every checkout; with
+# the pooler in front, 30-minute recycling plus skipping the reset-on-return
+# ROLLBACK is the cheaper way to keep the pool healthy.
+engine = create_async_engine(
+    _async_url(DATABASE_URL),
+    pool_size=20,
+    max_overflow=10,
+    pool_recycle=1800,
+    pool_timeout=30,
+    pool_pre_ping=False,
+    pool_reset_on_return=None,
+    echo=ECHO,
+    connect_args={
+        "ssl": "require",
+        "statement_cache_size": 0,
+        # keep one runaway query from pinning a pooled connection
+        "server_settings": {"statement_timeout": "15s"},
+    },
+)
+# expire_on_commit=False is load-bearing: the CRUD handlers return the
+# RETURNING row (or the in-memory object) straight after commit, and
+# expiring would re-SELECT every attribute on first access.
+SessionLocal = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
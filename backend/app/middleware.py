@@ -0,0 +1,129 @@
+# app/middleware.py
+"""Minimal pure-ASGI CORS middleware.
+
+Starlette's CORSMiddleware carries regex matching and per-request header
+object allocation we never need; a direct ASGI wrapper can short-circuit
+preflights and append precomputed header tuples without building Request
+or Response objects on every call.
+
+Two modes, chosen at import time:
+
+* ``ALLOWED_ORIGINS`` unset — historical wildcard behaviour. Note that
+  browsers refuse to combine ``*`` with credentials, so credentialed
+  frontends must use the allowlist.
+* ``ALLOWED_ORIGINS`` set (comma-separated origins) — the request origin
+  is echoed back with ``allow-credentials: true`` when it matches, and
+  preflight responses echo the requested method/headers (with credentials
+  a literal ``*`` is ignored by browsers). Header lists are precomputed
+  per origin.
+
+Preflights are cached client-side for a day (``max-age=86400``), so a
+browser pays the extra OPTIONS round trip once per origin/route rather
+than once per request.
+"""
+
+import os
+
+_MAX_AGE = b"86400"
+
+_ALLOWED_ORIGINS = tuple(
+    o.strip() for o in os.environ.get("ALLOWED_ORIGINS", "").split(",") if o.strip()
+)
+
+_CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+]
+
+_PREFLIGHT_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-methods", b"*"),
+    (b"access-control-allow-headers", b"*"),
+    (b"access-control-max-age", _MAX_AGE),
+]
+
+# origin -> precomputed simple-response / preflight header lists
+_ORIGIN_HEADERS = {}
+_ORIGIN_PREFLIGHT = {}
+for _o in _ALLOWED_ORIGINS:
+    _ob = _o.encode("latin-1")
+    _base = [
+        (b"access-control-allow-origin", _ob),
+        (b"access-control-allow-credentials", b"true"),
+        (b"vary", b"origin"),
+    ]
+    _ORIGIN_HEADERS[_ob] = _base
+    _ORIGIN_PREFLIGHT[_ob] = _base + [(b"access-control-max-age", _MAX_AGE)]
+
+
+def _scope_header(scope, name: bytes) -> bytes:
+    for k, v in scope["headers"]:
+        if k == name:
+            return v
+    return b""
+
+
+class CORSWildcardASGI:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if _ALLOWED_ORIGINS:
+            await self._allowlisted(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS":
+            # preflight: answer directly with the precomputed headers
+            await send({
+                "type": "http.response.start",
+                "status": 204,
+                "headers": list(_PREFLIGHT_HEADERS),
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers") or []) + _CORS_HEADERS
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    async def _allowlisted(self, scope, receive, send):
+        origin = _scope_header(scope, b"origin")
+        cors = _ORIGIN_HEADERS.get(origin)
+
+        if scope["method"] == "OPTIONS":
+            headers = []
+            if cors is not None:
+                # with credentials, "*" is not honoured — echo what the
+                # browser asked for
+                headers = list(_ORIGIN_PREFLIGHT[origin])
+                req_method = _scope_header(scope, b"access-control-request-method")
+                req_headers = _scope_header(scope, b"access-control-request-headers")
+                if req_method:
+                    headers.append((b"access-control-allow-methods", req_method))
+                if req_headers:
+                    headers.append((b"access-control-allow-headers", req_headers))
+            await send({
+                "type": "http.response.start",
+                "status": 204,
+                "headers": headers,
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if cors is None:
+            # non-CORS request (or disallowed origin): pass through untouched
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers") or []) + cors
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
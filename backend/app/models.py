@@ -1,54 +1,84 @@
+from enum import Enum
 from typing import List, Literal, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
-class HealthResponse(BaseModel):
+class Role(str, Enum):
+    # one enum schema shared by MessageIn/MessageOut instead of a tagged
+    # Literal union rebuilt per model
+    system = "system"
+    user = "user"
+    assistant = "assistant"
+
+class APIModel(BaseModel):
+    # Defer core-schema builds to first use so importing this module does
+    # not pay the pydantic schema-walk cost for every model up front.
+    model_config = ConfigDict(defer_build=True)
+
+class HealthResponse(APIModel):
     status: Literal["ok"]
     time: str
 
-class ConversationSummary(BaseModel):
+class ConversationSummary(APIModel):
     id: str
     last_at: Optional[str]
     count: int
 
-class CreateConversationResponse(BaseModel):
+class CreateConversationResponse(APIModel):
     id: str
 
-class OkResponse(BaseModel):
+class ConversationPage(APIModel):
+    items: List[ConversationSummary]
+    next_page_token: Optional[str] = None
+
+class OkResponse(APIModel):
     ok: bool
 
-class MessageIn(BaseModel):
-    role: Literal["system", "user", "assistant"]
+class MessageIn(APIModel):
+    role: Role
     content: str = Field(min_length=1)
 
-class MessageOut(BaseModel):
-    role: Literal["system", "user", "assistant"]
+class MessageOut(APIModel):
+    role: Role
     content: str
     ts: str
 
 # Sign-in
-class SignInRequest(BaseModel):
+class SignInRequest(APIModel):
     username: str = Field(min_length=1)
     password: str = Field(min_length=1)
 
-class User(BaseModel):
+class User(APIModel):
     id: str
     username: str
     conversation_id: str
 
 # Uploads
-class FileItem(BaseModel):
+class FileItem(APIModel):
     filename: str
     size: int
 
-class FileUploadResponse(BaseModel):
+class FileUploadResponse(APIModel):
     uploaded: List[FileItem]
 
-class FileListResponse(BaseModel):
+class FileListResponse(APIModel):
     files: List[FileItem]
 
 # Ask (chat to AI)
-class AskRequest(BaseModel):
+class AskRequest(APIModel):
     question: str = Field(min_length=1)
 
-class AskResponse(BaseModel):
+class AskResponse(APIModel):
     answer: str
+
+def rebuild_all() -> None:
+    """Force-build every deferred core schema (see APIModel's defer_build).
+
+    Called from the app lifespan so the first request doesn't pay the
+    pydantic schema-build cost.
+    """
+    for m in (
+        HealthResponse, ConversationSummary, CreateConversationResponse, ConversationPage, OkResponse,
+        MessageIn, MessageOut, SignInRequest, User, FileItem, FileUploadResponse,
+        FileListResponse, AskRequest, AskResponse,
+    ):
+        m.model_rebuild(force=True)
@@ -1,6 +1,6 @@
 # app/models_db.py
-from sqlalchemy import Column, String, Integer, Date, Numeric, Text, Enum
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import Column, String, Integer, Date, Numeric, Text, Index
+from sqlalchemy.dialects.postgresql import ARRAY, ENUM as PGEnum
 import enum
 from .db import Base  # ✅ relative import
 
@@ -20,24 +20,46 @@ class Priority(str, enum.Enum):
     Medium = "Medium"
     High = "High"
 
+# Native Postgres enum types shared across tables: validation happens in the
+# DB (1-byte OID) instead of a Python-side coercion per row. Columns carry
+# plain strings; the Python enums above stay as the canonical value lists for
+# input parsing.
+PROFICIENCY = PGEnum(*[m.value for m in Proficiency], name="proficiency", create_type=True)
+EMPLOYMENT_TYPE = PGEnum(*[m.value for m in EmploymentType], name="employment_type", create_type=True)
+PRIORITY = PGEnum(*[m.value for m in Priority], name="priority", create_type=True)
+
 class Resource(Base):
     __tablename__ = "resources"
+    # composite index so "this user's conversation" listings are a single
+    # index scan instead of a bitmap-AND of two single-column indexes;
+    # user_id alone is covered by the prefix
+    __table_args__ = (
+        Index("ix_resources_user_conv", "user_id", "conversation_id"),
+        # covers the list/dataset shape: filter by conversation(+user) then
+        # order_by resource_id + limit becomes a pure index range scan with
+        # no sort node
+        Index("ix_res_conv_user_id", "conversation_id", "user_id", "resource_id"),
+    )
     resource_id = Column(String, primary_key=True)
     name = Column(String, nullable=False)
     role = Column(String, nullable=False)
     skills = Column(ARRAY(Text), nullable=False)
-    proficiency_level = Column(Enum(Proficiency), nullable=True)
+    proficiency_level = Column(PROFICIENCY, nullable=True)
     capacity_hrs_per_week = Column(Integer)
     current_commitments = Column(Text)
     availability_date = Column(Date)
     location_timezone = Column(String)
-    employment_type = Column(Enum(EmploymentType), nullable=True)
+    employment_type = Column(EMPLOYMENT_TYPE, nullable=True)
     cost_per_hour_inr = Column(Numeric(12, 2))
     conversation_id = Column(String, index=True, nullable=True)
-    user_id = Column(String, index=True, nullable=True)
+    user_id = Column(String, nullable=True)  # indexed via the composite above
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_user_conv", "user_id", "conversation_id"),
+        Index("ix_proj_conv_user_id", "conversation_id", "user_id", "project_id"),
+    )
     project_id = Column(String, primary_key=True)
     name = Column(String, nullable=False)
     summary = Column(Text, nullable=True)
@@ -47,8 +69,8 @@ class Project(Base):
     end_date = Column(Date)
     milestones = Column(Text)
     required_roles = Column(String, nullable=True)
-    priority = Column(Enum(Priority), nullable=True)
+    priority = Column(PRIORITY, nullable=True)
     budget_inr = Column(Integer, nullable=True)
     compliance = Column(String, nullable=True)
     conversation_id = Column(String, index=True, nullable=True)
-    user_id = Column(String, index=True, nullable=True)
+    user_id = Column(String, nullable=True)  # indexed via the composite above
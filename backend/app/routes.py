@@ -1,14 +1,29 @@
-from fastapi import APIRouter, Header, Query, HTTPException, UploadFile, File, Form, Request
+from fastapi import APIRouter, Header, Query, HTTPException, UploadFile, File, Form, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import List
 from pathlib import Path
+import asyncio
+import base64
+import hashlib
+import hmac
 import os
+import secrets
+import string
+import time
+import threading
+import aiofiles
 import httpx
-import json
+import orjson
+from cachetools import TTLCache
+from pydantic import TypeAdapter
 
 from .models import (
     HealthResponse,
     CreateConversationResponse,
+    ConversationPage,
     ConversationSummary,
     OkResponse,
     MessageIn,
@@ -19,45 +34,114 @@ from .models import (
     FileUploadResponse,
     FileListResponse,
     AskRequest,
-    AskResponse,
 )
 from . import storage
-from .config import DEFAULT_USER, UPLOADS_DIR, SAFE_NAME_RE, ID_RE
+from .config import (
+    ANSWER_CACHE_TTL,
+    AUTO_INGEST_CONCURRENCY,
+    DEFAULT_USER,
+    UPLOADS_DIR,
+    UPLOAD_CHUNK_SIZE,
+    USERS,
+    valid_cid,
+)
 
 router = APIRouter()
 N8N_WEBHOOK_URL = os.getenv("N8N_WEBHOOK_URL")  # set this in .env if you want to use n8n
 
+# Auth header resolved once at import: the env doesn't change while the
+# worker is alive, so there's no point re-reading it per request.
+_N8N_AUTH_HEADER = os.getenv("N8N_AUTH_HEADER")
+_N8N_AUTH_VALUE = os.getenv("N8N_AUTH_VALUE")
+_N8N_HEADERS = {"content-type": "application/json"}
+if _N8N_AUTH_HEADER and _N8N_AUTH_VALUE:
+    _N8N_HEADERS[_N8N_AUTH_HEADER] = _N8N_AUTH_VALUE
+
+# dumps the whole history list in one validated pass instead of a per-model
+# .dict() shim call
+_HIST_ADAPTER = TypeAdapter(list[MessageOut])
+
+# Recent-answer cache: identical questions from the same user within the
+# TTL skip the n8n round-trip entirely. Both messages are still persisted
+# on a hit so conversation context stays correct.
+_ANSWER_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=ANSWER_CACHE_TTL)
+_ANSWER_CACHE_LOCK = threading.Lock()
+
+def _answer_cache_key(uid: str, question: str) -> tuple:
+    return uid, hashlib.blake2b(question.encode(), digest_size=16).digest()
+
+# Timestamp cache at 1-second granularity: /health and message appends call
+# this on every request, and rebuilding the datetime + isoformat string each
+# time is the dominant Python-side cost there. Worst case under races is
+# rebuilding the same string twice, so no lock is needed.
+_last_sec = 0
+_last_iso = ""
+
 def _utc_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    global _last_sec, _last_iso
+    s = int(time.time())
+    if s != _last_sec:
+        _last_iso = datetime.fromtimestamp(s, timezone.utc).isoformat()
+        _last_sec = s
+    return _last_iso
 
 def _resolve_user(user_q: str | None, x_user_id: str | None) -> str:
     return (x_user_id or user_q or DEFAULT_USER)
 
-def _user_upload_dir(user_id: str, cid: str) -> Path:
-    if not ID_RE.match(cid):
-        raise HTTPException(status_code=422, detail="conversation_id must be uuid hex (32 chars)")
+@lru_cache(maxsize=4096)
+def _user_upload_dir_cached(user_id: str, cid: str) -> Path:
+    # resolve + mkdir once per (user, conversation); later hits skip the
+    # stat/mkdir syscall pair entirely
     p = (UPLOADS_DIR / user_id / cid).resolve()
     p.mkdir(parents=True, exist_ok=True)
     return p
 
+def _user_upload_dir(user_id: str, cid: str) -> Path:
+    if not valid_cid(cid):
+        raise HTTPException(status_code=422, detail="conversation_id must be uuid hex (32 chars)")
+    return _user_upload_dir_cached(user_id, cid)
+
+# 256-entry byte table: keep alnum/dot/dash/underscore, map space to "_",
+# everything else (including each byte of a multi-byte char) becomes "-".
+# One C-loop translate pass instead of strip + replace + regex.
+_SAFE_NAME_CHARS = frozenset(string.ascii_letters + string.digits + "._-")
+_SAFE_NAME_TABLE = bytes(
+    ord("_") if b == ord(" ") else (b if chr(b) in _SAFE_NAME_CHARS else ord("-"))
+    for b in range(256)
+)
+
 def _sanitize_name(name: str) -> str:
-    name = (name or "file").strip().replace(" ", "_")
-    return SAFE_NAME_RE.sub("-", name) or "file"
+    name = (name or "file").strip()
+    return name.encode("utf-8", "replace").translate(_SAFE_NAME_TABLE).decode("ascii") or "file"
+
+def _claim_target(updir: Path, safe: str) -> tuple[str, int]:
+    """Atomically claim a free filename with O_CREAT|O_EXCL.
+
+    One syscall in the common case, no stat-per-candidate scan and no race
+    between concurrent uploads of the same name; collisions retry with a
+    short random suffix. updir was already resolved by _user_upload_dir,
+    so candidates are joined as plain strings — no per-attempt Path
+    construction. Returns the claimed name and the open fd.
+    """
+    updir_str = str(updir)
+    base, ext = os.path.splitext(safe)
+    name = safe
+    for _ in range(32):
+        try:
+            fd = os.open(os.path.join(updir_str, name), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            return name, fd
+        except FileExistsError:
+            name = f"{base}_{secrets.token_hex(4)}{ext}"
+    raise HTTPException(status_code=409, detail="could not allocate a free filename")
 
 @router.get("/health", response_model=HealthResponse)
 def health() -> HealthResponse:
     return HealthResponse(status="ok", time=_utc_iso())
 
-_USERS = {
-    "admin": "secret",
-    "demo": "demo",
-    "hello": "pass123",
-}
-
 @router.post("/auth/signin", response_model=User)
 def signin(body: SignInRequest) -> User:
-    expected = _USERS.get(body.username)
-    if expected is None or expected != body.password:
+    expected = USERS.get(body.username)
+    if expected is None or not hmac.compare_digest(expected.encode(), body.password.encode()):
         raise HTTPException(status_code=401, detail="invalid credentials")
     cid = storage.create_conversation(user_id=body.username)
     return User(id=body.username, username=body.username, conversation_id=cid)
@@ -71,14 +155,36 @@ def create_conversation(
     cid = storage.create_conversation(user_id=uid)
     return CreateConversationResponse(id=cid)
 
-@router.get("/conversations", response_model=list[ConversationSummary])
+def _decode_page_token(token: str) -> tuple[int, str]:
+    try:
+        raw = base64.urlsafe_b64decode(token.encode()).decode()
+        mtime_ns, _, cid = raw.partition(":")
+        return int(mtime_ns), cid
+    except Exception:
+        raise HTTPException(status_code=422, detail="invalid page_token")
+
+def _encode_page_token(cursor: tuple[int, str]) -> str:
+    return base64.urlsafe_b64encode(f"{cursor[0]}:{cursor[1]}".encode()).decode()
+
+# response_model=None on the two list endpoints: storage already returns
+# validated model instances, so FastAPI's per-item re-validation pass is
+# pure overhead on large histories (the return annotation keeps the docs)
+@router.get("/conversations", response_model=None)
 def list_conversations(
     limit: int = Query(default=50, ge=1),
+    page_token: str | None = Query(default=None),
     user: str | None = Query(default=None),
     x_user_id: str | None = Header(default=None, alias="X-User-ID"),
-) -> list[ConversationSummary]:
+) -> ConversationPage:
     uid = _resolve_user(user, x_user_id)
-    return storage.list_conversations(user_id=uid, limit=limit)
+    # keyset pagination: the token pins the page edge by (mtime_ns, cid),
+    # so deep pages skip entries instead of re-summarizing the whole dir
+    before = _decode_page_token(page_token) if page_token else None
+    items, cursor = storage.list_conversations(user_id=uid, limit=limit, before=before)
+    return ConversationPage(
+        items=items,
+        next_page_token=_encode_page_token(cursor) if cursor else None,
+    )
 
 @router.get("/conversations/{conversation_id}", response_model=ConversationSummary)
 def get_conversation(
@@ -109,15 +215,39 @@ def append_message(
     uid = _resolve_user(user, x_user_id)
     return storage.append_message(user_id=uid, cid=conversation_id, role=body.role, content=body.content)
 
-@router.get("/conversations/{conversation_id}/messages", response_model=list[MessageOut])
+@router.post("/conversations/{conversation_id}/messages:bulk", response_model=List[MessageOut])
+def append_messages_bulk(
+    conversation_id: str,
+    body: List[MessageIn],
+    user: str | None = Query(default=None),
+    x_user_id: str | None = Header(default=None, alias="X-User-ID"),
+) -> List[MessageOut]:
+    """Append a batch of messages in one lock/write cycle.
+
+    Importers posting message-by-message pay a lock acquisition and a
+    write syscall per message; the batch lands as a single append."""
+    uid = _resolve_user(user, x_user_id)
+    if not body:
+        raise HTTPException(status_code=422, detail="messages must be non-empty")
+    return storage.append_messages(uid, conversation_id, [(m.role, m.content) for m in body])
+
+@router.get("/conversations/{conversation_id}/messages", response_model=None)
 def get_messages(
     conversation_id: str,
+    response: Response,
     limit: int = Query(default=50, ge=1),
     offset: int = Query(default=0, ge=0),
     user: str | None = Query(default=None),
     x_user_id: str | None = Header(default=None, alias="X-User-ID"),
-) -> list[MessageOut]:
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+):
     uid = _resolve_user(user, x_user_id)
+    # (mtime_ns, size) fingerprint: an unchanged conversation costs one
+    # stat and a 304 instead of a full file read + serialize
+    etag = f'"{storage.conversation_etag(uid, conversation_id)}"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return storage.get_messages(user_id=uid, cid=conversation_id, limit=limit, offset=offset)
 
 @router.post("/files/upload", response_model=FileUploadResponse)
@@ -138,65 +268,159 @@ async def upload_files(
     # save files
     for uf in files:
         safe = _sanitize_name(uf.filename or "file")
-        target = (updir / safe).resolve()
-        i = 1
-        base, ext = os.path.splitext(safe)
-        while target.exists():
-            target = (updir / f"{base}_{i}{ext}").resolve()
-            i += 1
-        data = await uf.read()
-        with target.open("wb") as f:
-            f.write(data)
-        uploaded.append(FileItem(filename=target.name, size=len(data)))
-
-    # optional auto-ingest
+        claimed, fd = _claim_target(updir, safe)
+        # stream in fixed-size chunks: O(1) memory per upload and the event
+        # loop stays responsive instead of buffering the whole file in RAM
+        size = 0
+        async with aiofiles.open(fd, "wb") as f:
+            while chunk := await uf.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
+                size += len(chunk)
+        uploaded.append(FileItem(filename=claimed, size=size))
+
+    # optional auto-ingest: fan out one coroutine per file so wall-clock is
+    # O(RTT) instead of O(files x RTT)
     if auto_ingest:
         base = str(request.base_url).rstrip("/")
-        async with httpx.AsyncClient(timeout=60) as client:
-            for item in uploaded:
-                path = updir / item.filename
-                name = item.filename.lower()
-                endpoints = (
-                    ["/data/resources/upload"] if "resource" in name else
-                    ["/data/projects/upload"] if "project" in name else
-                    ["/data/resources/upload", "/data/projects/upload"]
-                )
-                ingested = False
-                for ep in endpoints:
-                    with path.open("rb") as fp:
-                        form = {
-                            "conversation_id": (None, conversation_id),
-                            "file": (item.filename, fp, "application/octet-stream"),
-                        }
-                        resp = await client.post(f"{base}{ep}", files=form)
-                        payload = {}
-                        try:
-                            payload = resp.json()
-                        except Exception:
-                            payload = {"status": resp.status_code, "text": resp.text}
-                        print("[AUTO_INGEST]", ep, payload)
-                        if isinstance(payload, dict) and int(payload.get("rows_ingested", 0)) > 0:
-                            ingested = True
-                            break
-                if not ingested:
-                    print("[AUTO_INGEST] no rows ingested for", item.filename)
+        client = request.app.state.http  # shared pooled client, see lifespan
+        results = await asyncio.gather(
+            *(_ingest_one(client, base, updir, conversation_id, item) for item in uploaded),
+            return_exceptions=True,
+        )
+        # one failed ingest must not sink the batch, but it must not vanish
+        # either — the upload itself still reports 200
+        for item, res in zip(uploaded, results):
+            if isinstance(res, BaseException):
+                print(f"[AUTO_INGEST] {item.filename} failed: {res!r}")
 
     return FileUploadResponse(uploaded=uploaded)
 
+# files below this are read into memory once and reused across endpoint
+# attempts; larger ones keep a single open handle and seek(0) between tries
+_INGEST_INLINE_LIMIT = 8 << 20
+
+# gate the gather fan-out: all files still run concurrently from the
+# caller's view, but at most AUTO_INGEST_CONCURRENCY ingests are in flight
+_ingest_semaphore = asyncio.Semaphore(AUTO_INGEST_CONCURRENCY)
+
+# filename-token → candidate endpoints; ambiguous names try everything.
+# A dict keeps the routing table in one place as the endpoint set grows.
+_ENDPOINT_MAP = {
+    "resource": ["/data/resources/upload"],
+    "project": ["/data/projects/upload"],
+}
+_ALL_EPS = ["/data/resources/upload", "/data/projects/upload"]
+
+async def _ingest_one(
+    client: httpx.AsyncClient, base: str, updir: Path, conversation_id: str, item: FileItem
+) -> None:
+    # Candidate endpoints are still tried in order (not raced): for an
+    # ambiguous filename, racing both could ingest the same file into both
+    # tables before either reports rows_ingested.
+    path = os.path.join(str(updir), item.filename)
+    lname = item.filename.lower()
+    endpoints = next((v for k, v in _ENDPOINT_MAP.items() if k in lname), _ALL_EPS)
+    async with _ingest_semaphore:
+        if item.size < _INGEST_INLINE_LIMIT:
+            # up to 8 MiB; read off the event loop like the other blocking I/O
+            body = await run_in_threadpool(Path(path).read_bytes)
+        else:
+            body = None
+        fp = open(path, "rb") if body is None else None
+        try:
+            for ep in endpoints:
+                if fp is not None:
+                    fp.seek(0)
+                form = {
+                    "conversation_id": (None, conversation_id),
+                    "file": (item.filename, body if body is not None else fp, "application/octet-stream"),
+                }
+                resp = await client.post(f"{base}{ep}", files=form)
+                try:
+                    payload = resp.json()
+                except Exception:
+                    payload = {"status": resp.status_code, "text": resp.text}
+                print("[AUTO_INGEST]", ep, payload)
+                if isinstance(payload, dict) and int(payload.get("rows_ingested", 0)) > 0:
+                    return
+        finally:
+            if fp is not None:
+                fp.close()
+    print("[AUTO_INGEST] no rows ingested for", item.filename)
+
+@router.post("/files/upload_stream", response_model=FileUploadResponse)
+async def upload_stream(
+    request: Request,
+    conversation_id: str = Query(...),
+    filename: str = Query(...),
+    user: str | None = Query(default=None),
+    x_user_id: str | None = Header(default=None, alias="X-User-ID"),
+) -> FileUploadResponse:
+    """Single-file fast path: the raw request body goes straight to disk,
+    skipping the multipart parser's spool-to-tempfile pass. Multi-file
+    callers keep using /files/upload."""
+    uid = _resolve_user(user, x_user_id)
+    storage.get_conversation(user_id=uid, cid=conversation_id)
+    updir = _user_upload_dir(uid, conversation_id)
+
+    safe = _sanitize_name(filename)
+    claimed, fd = _claim_target(updir, safe)
+
+    size = 0
+    async with aiofiles.open(fd, "wb") as f:
+        async for chunk in request.stream():
+            await f.write(chunk)
+            size += len(chunk)
+    return FileUploadResponse(uploaded=[FileItem(filename=claimed, size=size)])
+
+@lru_cache(maxsize=256)
+def _scan_upload_dir(updir: str, _mtime_ns: int) -> tuple[tuple[str, int], ...]:
+    # keyed by (path, dir mtime): any upload/delete bumps the directory
+    # mtime, which changes the key and invalidates the cached listing.
+    # scandir serves name + size from one pass (stat is cached on Linux).
+    # follow_symlinks=False reads the cached d_type from getdents, so the
+    # type check costs zero extra syscalls on Linux
+    with os.scandir(updir) as it:
+        entries = [(e.name, e.stat().st_size) for e in it if e.is_file(follow_symlinks=False)]
+    entries.sort()
+    return tuple(entries)
+
 @router.get("/files/{conversation_id}", response_model=FileListResponse)
-def list_files(
+async def list_files(
     conversation_id: str,
+    response: Response,
     user: str | None = Query(default=None),
     x_user_id: str | None = Header(default=None, alias="X-User-ID"),
-) -> FileListResponse:
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+):
     uid = _resolve_user(user, x_user_id)
-    storage.get_conversation(user_id=uid, cid=conversation_id)
+    # async handler keeps the route off the shared threadpool's sync-handler
+    # budget; the genuinely blocking filesystem work is offloaded explicitly
+    await run_in_threadpool(storage.get_conversation, user_id=uid, cid=conversation_id)
     updir = _user_upload_dir(uid, conversation_id)
-    items: List[FileItem] = []
-    for p in sorted(updir.glob("*")):
-        if p.is_file():
-            items.append(FileItem(filename=p.name, size=p.stat().st_size))
-    return FileListResponse(files=items)
+    mtime_ns = updir.stat().st_mtime_ns
+    # the upload dir's mtime changes on every add/remove, so it is a
+    # sufficient fingerprint for the listing
+    etag = f'"{hashlib.blake2b(str(mtime_ns).encode(), digest_size=8).hexdigest()}"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    entries = await run_in_threadpool(_scan_upload_dir, str(updir), mtime_ns)
+    return FileListResponse(files=[FileItem(filename=n, size=s) for n, s in entries])
+
+# key tables for _coerce_answer_from_any, hoisted so the hot answer
+# extraction path doesn't rebuild them per call
+_DIRECT_KEYS = ("answer", "text", "content", "message", "result", "response")
+_NESTED_KEYS = ("answer", "text", "content", "message")
+
+def _s(v) -> str | None:
+    # strip once: the old `if v.strip(): return v.strip()` pattern built the
+    # stripped copy twice per candidate key
+    if isinstance(v, str):
+        v = v.strip()
+        if v:
+            return v
+    return None
 
 def _coerce_answer_from_any(obj) -> str | None:
     """
@@ -210,25 +434,31 @@ def _coerce_answer_from_any(obj) -> str | None:
     if obj is None:
         return None
     if isinstance(obj, str):
-        return obj.strip() or None
+        return _s(obj)
     if not isinstance(obj, dict):
         # best-effort: stringify
         try:
-            return json.dumps(obj, ensure_ascii=False)
+            return orjson.dumps(obj).decode()
         except Exception:
             return str(obj)
 
+    if not obj:
+        # empty dict: nothing to extract and "{}" is not an answer
+        return None
+
     # common direct keys
-    for k in ("answer", "text", "content", "message", "result", "response"):
-        v = obj.get(k)
-        if isinstance(v, str) and v.strip():
-            return v.strip()
+    get = obj.get
+    for k in _DIRECT_KEYS:
+        v = get(k)
+        s = _s(v)
+        if s:
+            return s
         if isinstance(v, dict):
             # nested common fields
-            for kk in ("answer", "text", "content", "message"):
-                vv = v.get(kk)
-                if isinstance(vv, str) and vv.strip():
-                    return vv.strip()
+            for kk in _NESTED_KEYS:
+                s = _s(v.get(kk))
+                if s:
+                    return s
 
     # OpenAI chat-completions shape
     choices = obj.get("choices")
@@ -237,58 +467,112 @@ def _coerce_answer_from_any(obj) -> str | None:
         if isinstance(first, dict):
             msg = first.get("message")
             if isinstance(msg, dict):
-                cc = msg.get("content")
-                if isinstance(cc, str) and cc.strip():
-                    return cc.strip()
+                cc = _s(msg.get("content"))
+                if cc:
+                    return cc
 
     # last resort: compact JSON
     try:
-        s = json.dumps(obj, ensure_ascii=False)
-        return s.strip() or None
+        return orjson.dumps(obj).decode()
     except Exception:
         return None
 
-@router.post("/ai/ask/{conversation_id}", response_model=AskResponse)
+@router.post("/ai/ask/{conversation_id}")
 async def ask(
+    request: Request,
     conversation_id: str,
     body: AskRequest,
     user: str | None = Query(default=None),
     x_user_id: str | None = Header(default=None, alias="X-User-ID"),
-) -> AskResponse:
+):
     uid = _resolve_user(user, x_user_id)
-    storage.append_message(user_id=uid, cid=conversation_id, role="user", content=body.question)
-
-    n8n_url = os.getenv("N8N_WEBHOOK_URL")
-    n8n_auth_header = os.getenv("N8N_AUTH_HEADER")
-    n8n_auth_value  = os.getenv("N8N_AUTH_VALUE")
-
-    answer_text: str | None = None
-    if n8n_url:
-        payload = {"user": uid, "conversation_id": conversation_id, "question": body.question}
-        headers = {}
-        if n8n_auth_header and n8n_auth_value:
-            headers[n8n_auth_header] = n8n_auth_value
-        try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                resp = await client.post(n8n_url, json=payload, headers=headers)
-            resp.raise_for_status()
-            ctype = (resp.headers.get("content-type") or "").lower()
-            if ctype.startswith("application/json"):
+    # history is read before the webhook call; the question itself travels
+    # in the payload's own field, and both new messages are persisted in a
+    # single batched write afterwards
+    history = storage.get_messages(user_id=uid, cid=conversation_id, limit=20, offset=0)
+
+    if N8N_WEBHOOK_URL:
+        cache_key = _answer_cache_key(uid, body.question)
+        with _ANSWER_CACHE_LOCK:
+            cached = _ANSWER_CACHE.get(cache_key)
+        if cached is not None:
+            # cache hit: skip the webhook but keep the conversation record;
+            # same text/plain body shape as the streaming miss path
+            storage.append_messages(
+                user_id=uid,
+                cid=conversation_id,
+                items=[("user", body.question), ("assistant", cached)],
+            )
+            return PlainTextResponse(cached)
+
+        payload = {
+            "user": uid,
+            "conversation_id": conversation_id,
+            "question": body.question,
+            "history": _HIST_ADAPTER.dump_python(history, mode="json"),
+        }
+
+        async def relay():
+            # The response body is always the answer text, never the raw
+            # upstream envelope. Plain-text upstreams stream straight
+            # through, so time-to-first-byte is the model's first-token
+            # latency; a JSON envelope is one logical document, so it is
+            # buffered, the answer extracted, and only that text yielded.
+            buf: list[str] = []
+            is_json = False
+            failed = False
+            streamed = False
+            try:
+                # shared client from the lifespan: keeps the TLS/TCP
+                # handshake to the n8n host out of every call
+                async with request.app.state.http.stream(
+                    "POST", N8N_WEBHOOK_URL, content=orjson.dumps(payload), headers=_N8N_HEADERS
+                ) as resp:
+                    resp.raise_for_status()
+                    ctype = (resp.headers.get("content-type") or "").lower()
+                    is_json = ctype.startswith("application/json")
+                    async for chunk in resp.aiter_text():
+                        buf.append(chunk)
+                        if not is_json:
+                            streamed = True
+                            yield chunk
+            except Exception as e:
+                failed = True
+                err = f"(n8n error: {e})"
+                buf.append(err)
+                streamed = True
+                yield err
+            answer_text = "".join(buf)
+            if is_json and not failed:
                 try:
-                    data = resp.json()
+                    answer_text = _coerce_answer_from_any(orjson.loads(answer_text))
                 except Exception:
-                    data = None
-                answer_text = _coerce_answer_from_any(data)
-            else:
-                answer_text = (resp.text or "").strip() or None
-        except Exception as e:
-            answer_text = f"(n8n error: {e})"
-    else:
-        answer_text = f"You asked: {body.question}"
-
-    # Final safety: never let None/empty through to storage
-    if not isinstance(answer_text, str) or not answer_text.strip():
-        answer_text = "(No answer returned by AI.)"
-
-    storage.append_message(user_id=uid, cid=conversation_id, role="assistant", content=answer_text)
-    return AskResponse(answer=answer_text)
\ No newline at end of file
+                    pass
+            if not isinstance(answer_text, str) or not answer_text.strip():
+                answer_text = "(No answer returned by AI.)"
+            elif not failed:
+                # only successful answers are worth replaying
+                with _ANSWER_CACHE_LOCK:
+                    _ANSWER_CACHE[cache_key] = answer_text
+            if not streamed:
+                # JSON envelope (or an empty body): the extracted answer is
+                # the whole stream
+                yield answer_text
+            # one lock + one append for both sides of the exchange
+            storage.append_messages(
+                user_id=uid,
+                cid=conversation_id,
+                items=[("user", body.question), ("assistant", answer_text)],
+            )
+
+        return StreamingResponse(relay(), media_type="text/plain; charset=utf-8")
+
+    # no webhook configured: echo, with the same plain-text contract as the
+    # streaming path
+    answer_text = f"You asked: {body.question}"
+    storage.append_messages(
+        user_id=uid,
+        cid=conversation_id,
+        items=[("user", body.question), ("assistant", answer_text)],
+    )
+    return PlainTextResponse(answer_text)
\ No newline at end of file
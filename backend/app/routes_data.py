@@ -12,11 +12,18 @@ Notes:
 - Improved logging, validation, error handling, and code structure.
 """
 
+import concurrent.futures
+import io
 import logging
-from typing import Any, Dict, List, Tuple, Optional, Union, Iterable
+import re
+
+import orjson
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Optional, Union, Iterable
 from datetime import datetime, date
 
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd  # imported lazily inside functions at runtime
+
 from fastapi import (
     APIRouter,
     UploadFile,
@@ -27,19 +34,24 @@ from fastapi import (
     Query,
     HTTPException,
 )
-from pydantic import BaseModel, Field, validator
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-
-from .db import Base, engine, get_db
+from fastapi.responses import StreamingResponse
+from typing_extensions import Annotated
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import raiseload
+
+from .db import get_db
 from .models_db import Resource, Project, Proficiency, EmploymentType, Priority
 
 # -----------------------------------------------------------------------------
-# Router & DB bootstrap
+# Router
 # -----------------------------------------------------------------------------
+# Schema creation (Base.metadata.create_all) happens in the app lifespan, see
+# app/__init__.py — it cannot run at import time with the async engine.
 
 router = APIRouter(prefix="/data", tags=["data"])
-Base.metadata.create_all(bind=engine)
 
 logger = logging.getLogger(__name__)
 if not logger.handlers:
@@ -49,6 +61,7 @@ if not logger.handlers:
 logger.setLevel(logging.INFO)
 
 ROW_ERROR_LIMIT = 10
+UPSERT_CHUNK = 500
 
 # -----------------------------------------------------------------------------
 # Helpers: parsing, enums, resolution
@@ -59,29 +72,38 @@ def _read_any_table(upload: UploadFile) -> pd.DataFrame:
     Reads a CSV or XLSX UploadFile into a DataFrame.
     Concatenates non-empty sheets for Excel.
     """
+    import pandas as pd
+
     name = (upload.filename or "").lower()
     logger.info("Reading upload: %s", name or "<unnamed>")
-    try:
-        upload.file.seek(0)
-    except Exception:
-        pass
 
-    if name.endswith(".csv"):
-        try:
-            df = pd.read_csv(upload.file)
-        finally:
-            try:
-                upload.file.seek(0)
-            except Exception:
-                pass
+    # one buffered read shared by both parse paths: no seek(0) dance on the
+    # spooled temp file, and the zip magic bytes (not the extension) decide
+    # whether this is a workbook
+    data = upload.file.read()
+    is_excel = data[:4] == b"PK\x03\x04" or name.endswith((".xlsx", ".xls"))
+
+    if not is_excel:
+        # pyarrow's reader is multi-threaded and several times faster
+        # than the default C engine on wide files
+        df = pd.read_csv(io.BytesIO(data), engine="pyarrow")
         logger.info("CSV parsed: shape=%s", df.shape)
         return df
 
-    # Excel path
-    xls = pd.ExcelFile(upload.file)
+    # Excel path: calamine (Rust) parses xlsx far faster than openpyxl
+    # and releases the GIL while parsing, so multi-sheet workbooks fan
+    # out across a small thread pool
+    xls = pd.ExcelFile(io.BytesIO(data), engine="calamine")
+    sheet_names = xls.sheet_names
+    if len(sheet_names) > 1:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(8, len(sheet_names))
+        ) as ex:
+            parsed = list(ex.map(xls.parse, sheet_names))
+    else:
+        parsed = [xls.parse(s) for s in sheet_names]
     frames: List[pd.DataFrame] = []
-    for sheet in xls.sheet_names:
-        tmp = xls.parse(sheet)
+    for sheet, tmp in zip(sheet_names, parsed):
         # Keep only non-empty (after dropping all-NaN rows)
         if tmp.dropna(how="all").shape[0] > 0:
             logger.info("Excel sheet kept: %s shape=%s", sheet, tmp.shape)
@@ -93,15 +115,18 @@ def _read_any_table(upload: UploadFile) -> pd.DataFrame:
     return out
 
 
+# one C-level pass over the header instead of four chained .replace
+# allocations ("₹" stays a .replace since it maps to multiple chars)
+_HEADER_TABLE = str.maketrans({" ": "_", "(": None, ")": None, "/": "_"})
+_NUM_TABLE = str.maketrans("", "", ",")
+
+
 def _norm_header(h: Any) -> str:
-    return (
-        str(h).strip().lower()
-        .replace(" ", "_")
-        .replace("(", "")
-        .replace(")", "")
-        .replace("₹", "inr")
-        .replace("/", "_")
-    )
+    return str(h).strip().lower().replace("₹", "inr").translate(_HEADER_TABLE)
+
+
+# split on either delimiter in one compiled pass instead of replace+split
+_SPLIT_RE = re.compile(r"[;,]+")
 
 
 def _split_list(val: Any) -> List[str]:
@@ -110,10 +135,12 @@ def _split_list(val: Any) -> List[str]:
     s = str(val).strip()
     if not s:
         return []
-    return [x.strip() for x in s.replace(";", ",").split(",") if x.strip()]
+    return [p for p in (x.strip() for x in _SPLIT_RE.split(s)) if p]
 
 
 def _to_date(val: Any) -> Optional[date]:
+    import pandas as pd
+
     if val is None:
         return None
     # Handle pandas NaN/NaT and blank strings
@@ -137,6 +164,8 @@ def _to_date(val: Any) -> Optional[date]:
 
 
 def _parse_int(val: Any) -> Optional[int]:
+    import pandas as pd
+
     if val is None:
         return None
     try:
@@ -144,7 +173,7 @@ def _parse_int(val: Any) -> Optional[int]:
             return None
     except Exception:
         pass
-    s = str(val).strip().replace(",", "")
+    s = str(val).strip().translate(_NUM_TABLE)
     if not s:
         return None
     try:
@@ -154,6 +183,8 @@ def _parse_int(val: Any) -> Optional[int]:
 
 
 def _parse_float(val: Any) -> Optional[float]:
+    import pandas as pd
+
     if val is None:
         return None
     try:
@@ -161,7 +192,7 @@ def _parse_float(val: Any) -> Optional[float]:
             return None
     except Exception:
         pass
-    s = str(val).strip().replace(",", "")
+    s = str(val).strip().translate(_NUM_TABLE)
     if not s:
         return None
     try:
@@ -170,18 +201,25 @@ def _parse_float(val: Any) -> Optional[float]:
         return None
 
 
+# case-insensitive {value|name → member} tables, built once: _enum_or_none
+# runs per cell per row, and a precomputed dict lookup beats re-scanning the
+# members (plus the getattr/lower churn) every call
+_ENUM_CACHE = {
+    cls: {**{m.value.lower(): m for m in cls}, **{m.name.lower(): m for m in cls}}
+    for cls in (Proficiency, EmploymentType, Priority)
+}
+
+
 def _enum_or_none(enum_cls, value: Optional[str]):
     if not value:
         return None
-    try:
-        return enum_cls(value)  # works if you're using Python Enum
-    except Exception:
-        # fall back to case-insensitive match by name
-        value_lower = value.lower()
-        for member in enum_cls:
-            if getattr(member, "value", str(member)).lower() == value_lower or member.name.lower() == value_lower:
-                return member
-        return None
+    return _ENUM_CACHE[enum_cls].get(str(value).strip().lower())
+
+
+def _enum_value_or_none(enum_cls, value: Optional[str]) -> Optional[str]:
+    # columns are native PG enums carrying plain strings
+    m = _enum_or_none(enum_cls, value)
+    return m.value if m is not None else None
 
 
 def _resolve_columns(df: pd.DataFrame, mapping: Dict[str, Any]) -> Tuple[Dict[str, str], List[str]]:
@@ -190,15 +228,16 @@ def _resolve_columns(df: pd.DataFrame, mapping: Dict[str, Any]) -> Tuple[Dict[st
     - resolved: {field: actual_col_name}
     - missing: fields that couldn't be resolved
     """
+    cols = set(df.columns)  # plain-set membership beats Index.__contains__ per candidate
     resolved: Dict[str, str] = {}
     for key, candidates in mapping.items():
         if isinstance(candidates, tuple):
             for c in candidates:
-                if c in df.columns:
+                if c in cols:
                     resolved[key] = c
                     break
         else:
-            if candidates in df.columns:
+            if candidates in cols:
                 resolved[key] = candidates
     missing = [k for k in mapping.keys() if k not in resolved]
     return resolved, missing
@@ -211,17 +250,173 @@ def _df_preview(df: pd.DataFrame, n: int = 3) -> List[Dict[str, Any]]:
         return []
 
 
-def _filter_by_conversation_and_user(query, model, conversation_id: str, x_user_id: Optional[str], user: Optional[str]):
-    q = query.filter(model.conversation_id == conversation_id)
+def _filter_by_conversation_and_user(stmt, model, conversation_id: str, x_user_id: Optional[str], user: Optional[str]):
+    stmt = stmt.where(model.conversation_id == conversation_id)
     if x_user_id or user:
-        q = q.filter(model.user_id == (x_user_id or user))
-    return q
+        stmt = stmt.where(model.user_id == (x_user_id or user))
+    return stmt
 
 
 # -----------------------------------------------------------------------------
 # Ingestion: Resources
 # -----------------------------------------------------------------------------
 
+def _series_or_none(df: pd.DataFrame, resolved: Dict[str, str], key: str) -> "pd.Series":
+    """The resolved column as a Series, or an all-None Series if absent."""
+    import pandas as pd
+
+    c = resolved.get(key)
+    if c is None:
+        return pd.Series([None] * len(df), index=df.index)
+    return df[c]
+
+
+def _clean_str(df: pd.DataFrame, resolved: Dict[str, str], key: str) -> "pd.Series":
+    return _series_or_none(df, resolved, key).fillna("").astype(str).str.strip()
+
+
+def _clean_list(df: pd.DataFrame, resolved: Dict[str, str], key: str) -> "pd.Series":
+    # one compiled-regex split over the whole column, then a tight
+    # per-cell comprehension — no Python-level parsing helper per cell
+    return (
+        _series_or_none(df, resolved, key)
+        .fillna("")
+        .astype(str)
+        .str.split(_SPLIT_RE)
+        .map(lambda xs: [x.strip() for x in xs if x.strip()])
+    )
+
+
+def _clean_date(df: pd.DataFrame, resolved: Dict[str, str], key: str) -> "pd.Series":
+    import pandas as pd
+
+    raw = _series_or_none(df, resolved, key)
+    # format="mixed" infers per element, so an ISO value in a column that
+    # happens to start with dd-mm-yyyy still parses correctly (a single
+    # inferred format would coerce it to NaT, or worse, swap month and day)
+    parsed = pd.to_datetime(raw, errors="coerce", format="mixed")
+    # residuals: explicit day-first layouts the mixed pass read as
+    # month-first-or-NaT; pinned formats so unambiguous values can't swap
+    missing = parsed.isna() & raw.notna()
+    for fmt in ("%d-%m-%Y", "%d/%m/%Y"):
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(raw[missing], errors="coerce", format=fmt)
+        missing = parsed.isna() & raw.notna()
+    return parsed.dt.date
+
+
+def _clean_num(df: pd.DataFrame, resolved: Dict[str, str], key: str) -> "pd.Series":
+    import pandas as pd
+
+    s = _series_or_none(df, resolved, key).astype(str).str.replace(",", "", regex=False)
+    return pd.to_numeric(s, errors="coerce")
+
+
+def _clean_enum(df: pd.DataFrame, resolved: Dict[str, str], key: str, enum_cls) -> "pd.Series":
+    # case-insensitive value/name match as a single dict .map over the column
+    lookup = {k: m.value for k, m in _ENUM_CACHE[enum_cls].items()}
+    return _clean_str(df, resolved, key).str.lower().map(lookup)
+
+
+def _prepare_resources(df: pd.DataFrame, resolved: Dict[str, str]) -> "pd.DataFrame":
+    """Clean all resource columns with whole-Series ops.
+
+    Each transformation runs once per column in C instead of once per cell
+    through the interpreter; bad cells coerce to None/NaN rather than
+    raising row-by-row.
+    """
+    import pandas as pd
+
+    return pd.DataFrame({
+        "resource_id": _clean_str(df, resolved, "resource_id"),
+        "name": _clean_str(df, resolved, "name"),
+        "role": _clean_str(df, resolved, "role"),
+        "skills": _clean_list(df, resolved, "skills"),
+        "proficiency_level": _clean_enum(df, resolved, "proficiency_level", Proficiency),
+        "capacity_hrs_per_week": _clean_num(df, resolved, "capacity_hrs_per_week"),
+        "current_commitments": _clean_str(df, resolved, "current_commitments"),
+        "availability_date": _clean_date(df, resolved, "availability_date"),
+        "location_timezone": _clean_str(df, resolved, "location_timezone"),
+        "employment_type": _clean_enum(df, resolved, "employment_type", EmploymentType),
+        "cost_per_hour_inr": _clean_num(df, resolved, "cost_per_hour_inr"),
+    })
+
+
+def _prepare_projects(df: pd.DataFrame, resolved: Dict[str, str]) -> "pd.DataFrame":
+    import pandas as pd
+
+    return pd.DataFrame({
+        "project_id": _clean_str(df, resolved, "project_id"),
+        "name": _clean_str(df, resolved, "name"),
+        "summary": _clean_str(df, resolved, "summary"),
+        "required_skills": _clean_list(df, resolved, "required_skills"),
+        "staffing_mix": _clean_str(df, resolved, "staffing_mix"),
+        "start_date": _clean_date(df, resolved, "start_date"),
+        "end_date": _clean_date(df, resolved, "end_date"),
+        "milestones": _clean_str(df, resolved, "milestones"),
+        "required_roles": _clean_str(df, resolved, "required_roles"),
+        "priority": _clean_enum(df, resolved, "priority", Priority),
+        "budget_inr": _clean_num(df, resolved, "budget_inr"),
+        "compliance": _clean_str(df, resolved, "compliance"),
+    })
+
+
+def _opt(v):
+    """NaN/NaT/"" → None for scalar cells coming out of a cleaned frame."""
+    import pandas as pd
+
+    if v is None or (isinstance(v, float) and v != v):
+        return None
+    if isinstance(v, str):
+        return v or None
+    return None if pd.isna(v) else v
+
+
+def _upsert_stmt(table, rows: List[Dict[str, Any]], conflict_col: str):
+    stmt = pg_insert(table).values(rows)
+    set_ = {c.name: stmt.excluded[c.name] for c in table.c if c.name != conflict_col}
+    return stmt.on_conflict_do_update(index_elements=[conflict_col], set_=set_)
+
+
+async def _upsert_rows(
+    db: AsyncSession, table, rows: List[Dict[str, Any]], conflict_col: str
+) -> Tuple[int, int, List[Dict[str, Any]]]:
+    """Bulk-upsert rows in chunks of UPSERT_CHUNK.
+
+    One INSERT ... ON CONFLICT DO UPDATE per chunk instead of a
+    SELECT+UPSERT roundtrip per row. Each chunk runs in a SAVEPOINT; if a
+    chunk fails it is retried row by row so only the genuinely bad rows
+    are reported, everything else still lands.
+    """
+    ok = failed = 0
+    row_errors: List[Dict[str, Any]] = []
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        chunk = rows[start:start + UPSERT_CHUNK]
+        try:
+            async with db.begin_nested():
+                await db.execute(_upsert_stmt(table, chunk, conflict_col))
+            ok += len(chunk)
+        except Exception:
+            for offset, row in enumerate(chunk):
+                try:
+                    async with db.begin_nested():
+                        await db.execute(_upsert_stmt(table, [row], conflict_col))
+                    ok += 1
+                except Exception as e:
+                    failed += 1
+                    if len(row_errors) < ROW_ERROR_LIMIT:
+                        row_errors.append({"row_index": start + offset, "error": str(e)})
+                    # full tracebacks only for the first few failures: a
+                    # mostly-bad file would otherwise spend its wall time
+                    # formatting identical tracebacks
+                    if failed <= 3:
+                        logger.exception("Row %s failed", start + offset)
+                    else:
+                        logger.warning("Row %s failed: %s", start + offset, e)
+    return ok, failed, row_errors
+
+
 _RES_MAPPING = {
     "resource_id": ("resource_id", "id"),
     "name": ("name", "full_name"),
@@ -247,17 +442,11 @@ async def upload_resources_xlsx(
     conversation_id: str = Form(...),
     user: Optional[str] = Query(default=None),
     x_user_id: Optional[str] = Header(default=None, alias="X-User-ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     logger.info("RESOURCES INGEST START cid=%s user=%s x=%s", conversation_id, user, x_user_id)
 
-    try:
-        df = _read_any_table(file)
-    finally:
-        try:
-            file.file.close()
-        except Exception:
-            pass
+    df = _read_any_table(file)
 
     if df.empty:
         logger.warning("No rows found")
@@ -290,40 +479,43 @@ async def upload_resources_xlsx(
             },
         )
 
-    ok = failed = 0
-    row_errors: List[Dict[str, Any]] = []
+    uid = x_user_id or user or "default"
+
+    # whole-column cleaning first (C-level pandas ops), then one cheap
+    # itertuples pass to build plain row dicts from already-clean values
+    clean = _prepare_resources(df, resolved)
+    payload: List[Dict[str, Any]] = []
+    append = payload.append
+    opt = _opt
+    # name=None yields plain tuples in _prepare_resources column order —
+    # the cleaned frame's shape is fixed, so positional unpacking is the
+    # fully specialized row constructor (no namedtuple build, no attribute
+    # dispatch per row)
+    for rid, name_v, role, skills, prof, cap, commit, avail, tz, emp, cost in clean.itertuples(index=False, name=None):
+        cap = opt(cap)
+        cost = opt(cost)
+        append({
+            "resource_id": rid,
+            "name": name_v,
+            "role": role,
+            "skills": skills,
+            "proficiency_level": opt(prof),
+            "capacity_hrs_per_week": int(cap) if cap is not None else None,
+            "current_commitments": opt(commit),
+            "availability_date": opt(avail),
+            "location_timezone": opt(tz),
+            "employment_type": opt(emp),
+            "cost_per_hour_inr": float(cost) if cost is not None else None,
+            "conversation_id": conversation_id,
+            "user_id": uid,
+        })
 
     try:
-        for idx, r in df.iterrows():
-            try:
-                obj = Resource(
-                    resource_id=str(r[resolved["resource_id"]]).strip(),
-                    name=str(r.get(resolved.get("name"), "")).strip(),
-                    role=str(r.get(resolved.get("role"), "")).strip(),
-                    skills=_split_list(r.get(resolved.get("skills"))),
-                    proficiency_level=_enum_or_none(Proficiency, r.get(resolved.get("proficiency_level"))),
-                    capacity_hrs_per_week=_parse_int(r.get(resolved.get("capacity_hrs_per_week"))),
-                    current_commitments=str(r.get(resolved.get("current_commitments"), "")).strip() or None,
-                    availability_date=_to_date(r.get(resolved.get("availability_date"))),
-                    location_timezone=str(r.get(resolved.get("location_timezone"), "")).strip() or None,
-                    employment_type=_enum_or_none(EmploymentType, r.get(resolved.get("employment_type"))),
-                    cost_per_hour_inr=_parse_float(r.get(resolved.get("cost_per_hour_inr"))),
-                    conversation_id=conversation_id,
-                    user_id=x_user_id or user or "default",
-                )
-                db.merge(obj)        # upsert by PK
-                db.flush()           # surface row-level errors early
-                ok += 1
-            except Exception as e:
-                failed += 1
-                if len(row_errors) < ROW_ERROR_LIMIT:
-                    row_errors.append({"row_index": int(idx), "error": str(e)})
-                logger.exception("Row %s failed", idx)
-
-        db.commit()
+        ok, failed, row_errors = await _upsert_rows(db, Resource.__table__, payload, "resource_id")
+        await db.commit()
     except Exception as e:
         logger.exception("Commit failed; rolling back")
-        db.rollback()
+        await db.rollback()
         raise
 
     logger.info("RESOURCES DONE ok=%s failed=%s", ok, failed)
@@ -341,18 +533,20 @@ async def upload_resources_xlsx(
 # Ingestion: Projects
 # -----------------------------------------------------------------------------
 
+# keys are the DB field names so `resolved` can drive the cleaned frame
+# (and the required-columns check) directly
 _PROJ_MAPPING = {
-    "id": ("project_id", "id", "p_id"),
+    "project_id": ("project_id", "id", "p_id"),
     "name": ("project_name", "name", "title"),
-    "problemStatement": ("summary", "problem_statement", "description"),
-    "requiredSkills": ("required_skills", "skills"),
-    "requiredSeniorityMix": ("staffing_mix", "target_staffing_mix"),
-    "startDate": ("start_date", "kickoff", "start"),
-    "endDate": ("end_date", "finish", "end"),
+    "summary": ("summary", "problem_statement", "description"),
+    "required_skills": ("required_skills", "skills"),
+    "staffing_mix": ("staffing_mix", "target_staffing_mix"),
+    "start_date": ("start_date", "kickoff", "start"),
+    "end_date": ("end_date", "finish", "end"),
     "milestones": ("milestones", "phases", "plan"),
-    "targetStaffing": ("required_roles", "roles"),
+    "required_roles": ("required_roles", "roles"),
     "priority": ("priority", "prio"),
-    "budget": ("budget_inr", "budget", "cost_inr"),
+    "budget_inr": ("budget_inr", "budget", "cost_inr"),
     "compliance": ("compliance", "constraints"),
 }
 
@@ -367,17 +561,11 @@ async def upload_projects_xlsx(
     conversation_id: str = Form(...),
     user: Optional[str] = Query(default=None),
     x_user_id: Optional[str] = Header(default=None, alias="X-User-ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     logger.info("PROJECTS INGEST START cid=%s user=%s x=%s", conversation_id, user, x_user_id)
 
-    try:
-        df = _read_any_table(file)
-    finally:
-        try:
-            file.file.close()
-        except Exception:
-            pass
+    df = _read_any_table(file)
 
     if df.empty:
         logger.warning("No rows found")
@@ -410,41 +598,37 @@ async def upload_projects_xlsx(
             },
         )
 
-    ok = failed = 0
-    row_errors: List[Dict[str, Any]] = []
+    uid = x_user_id or user or "default"
+
+    clean = _prepare_projects(df, resolved)
+    payload: List[Dict[str, Any]] = []
+    append = payload.append
+    opt = _opt
+    for pid, name_v, summary, skills, mix, start, end, miles, roles, prio, budget, comp in clean.itertuples(index=False, name=None):
+        budget = opt(budget)
+        append({
+            "project_id": pid,
+            "name": name_v,
+            "summary": opt(summary),
+            "required_skills": skills,
+            "staffing_mix": opt(mix),
+            "start_date": opt(start),
+            "end_date": opt(end),
+            "milestones": opt(miles),
+            "required_roles": opt(roles),
+            "priority": opt(prio),
+            "budget_inr": int(budget) if budget is not None else None,
+            "compliance": opt(comp),
+            "conversation_id": conversation_id,
+            "user_id": uid,
+        })
 
     try:
-        for idx, r in df.iterrows():
-            try:
-                obj = Project(
-                    project_id=str(r[resolved["project_id"]]).strip(),
-                    name=str(r.get(resolved.get("name"), "")).strip(),
-                    summary=str(r.get(resolved.get("summary"), "")).strip() or None,
-                    required_skills=_split_list(r.get(resolved.get("required_skills"))),
-                    staffing_mix=str(r.get(resolved.get("staffing_mix"), "")).strip() or None,
-                    start_date=_to_date(r.get(resolved.get("start_date"))),
-                    end_date=_to_date(r.get(resolved.get("end_date"))),
-                    milestones=str(r.get(resolved.get("milestones"), "")).strip() or None,
-                    required_roles=str(r.get(resolved.get("required_roles"), "")).strip() or None,
-                    priority=_enum_or_none(Priority, r.get(resolved.get("priority"))),
-                    budget_inr=_parse_int(r.get(resolved.get("budget_inr"))),
-                    compliance=str(r.get(resolved.get("compliance"), "")).strip() or None,
-                    conversation_id=conversation_id,
-                    user_id=x_user_id or user or "default",
-                )
-                db.merge(obj)  # upsert
-                db.flush()
-                ok += 1
-            except Exception as e:
-                failed += 1
-                if len(row_errors) < ROW_ERROR_LIMIT:
-                    row_errors.append({"row_index": int(idx), "error": str(e)})
-                logger.exception("Row %s failed", idx)
-
-        db.commit()
+        ok, failed, row_errors = await _upsert_rows(db, Project.__table__, payload, "project_id")
+        await db.commit()
     except Exception as e:
         logger.exception("Commit failed; rolling back")
-        db.rollback()
+        await db.rollback()
         raise
 
     logger.info("PROJECTS DONE ok=%s failed=%s", ok, failed)
@@ -467,26 +651,25 @@ async def upload_projects_xlsx(
     summary="Get compact dataset",
     description="Returns a compact list of resources & projects for a conversation (optionally scoped to a user).",
 )
-def dataset(
+async def dataset(
     conversation_id: str = Query(...),
     limit: int = Query(200, ge=1, le=1000),
     user: Optional[str] = Query(default=None),
     x_user_id: Optional[str] = Header(default=None, alias="X-User-ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    res_cnt = db.execute(text("SELECT COUNT(*) FROM resources")).scalar()
-    proj_cnt = db.execute(text("SELECT COUNT(*) FROM projects")).scalar()
-    logger.info("[DATASET] counts: resources=%s projects=%s (cid=%s)", res_cnt, proj_cnt, conversation_id)
-
+    # plain column selects: no unfiltered COUNT(*) table scans for a log
+    # line, and Row tuples skip ORM object construction entirely
     resources_q = _filter_by_conversation_and_user(
-        db.query(Resource), Resource, conversation_id, x_user_id, user
+        select(*Resource.__table__.c), Resource, conversation_id, x_user_id, user
     )
     projects_q = _filter_by_conversation_and_user(
-        db.query(Project), Project, conversation_id, x_user_id, user
+        select(*Project.__table__.c), Project, conversation_id, x_user_id, user
     )
 
-    resources = resources_q.order_by(Resource.resource_id).limit(limit).all()
-    projects = projects_q.order_by(Project.project_id).limit(limit).all()
+    resources = (await db.execute(resources_q.order_by(Resource.resource_id).limit(limit))).all()
+    projects = (await db.execute(projects_q.order_by(Project.project_id).limit(limit))).all()
+    logger.info("[DATASET] resources=%s projects=%s (cid=%s)", len(resources), len(projects), conversation_id)
 
     return {
         "resources": [{
@@ -494,12 +677,14 @@ def dataset(
             "name": r.name,
             "role": r.role,
             "skills": r.skills,
-            "proficiency": r.proficiency_level.value if r.proficiency_level else None,
+            "proficiency": r.proficiency_level,
             "capacity": r.capacity_hrs_per_week,
             "commitments": r.current_commitments,
-            "availability_date": r.availability_date.isoformat() if r.availability_date else None,
+            # orjson serializes datetime.date natively; no Python-side
+            # isoformat per row
+            "availability_date": r.availability_date,
             "timezone": r.location_timezone,
-            "type": r.employment_type.value if r.employment_type else None,
+            "type": r.employment_type,
             "cost_hour": float(r.cost_per_hour_inr) if r.cost_per_hour_inr is not None else None,
         } for r in resources],
         "projects": [{
@@ -508,11 +693,11 @@ def dataset(
             "summary": p.summary,
             "required_skills": p.required_skills,
             "staffing_mix": p.staffing_mix,
-            "start_date": p.start_date.isoformat() if p.start_date else None,
-            "end_date": p.end_date.isoformat() if p.end_date else None,
+            "start_date": p.start_date,
+            "end_date": p.end_date,
             "milestones": p.milestones,
             "required_roles": p.required_roles,
-            "priority": p.priority.value if p.priority else None,
+            "priority": p.priority,
             "budget_inr": p.budget_inr,
             "compliance": p.compliance,
         } for p in projects],
@@ -520,9 +705,9 @@ def dataset(
 
 
 @router.get("/debug/status", summary="Lightweight DB counts")
-def debug_status(db: Session = Depends(get_db)):
-    res = db.execute(text("SELECT COUNT(*) FROM resources")).scalar()
-    proj = db.execute(text("SELECT COUNT(*) FROM projects")).scalar()
+async def debug_status(db: AsyncSession = Depends(get_db)):
+    res = await db.scalar(text("SELECT COUNT(*) FROM resources"))
+    proj = await db.scalar(text("SELECT COUNT(*) FROM projects"))
     return {"resources_count": res, "projects_count": proj}
 
 
@@ -544,34 +729,35 @@ def _to_opt_date(val: Union[str, date, None]) -> Optional[date]:
     return _to_date(val)
 
 
+# Reusable annotated field types: the coercion runs as a pydantic-core
+# BeforeValidator, so the declared field type is the real parsed type and
+# the per-class validator methods go away.
+Skills = Annotated[List[str], BeforeValidator(_to_list)]
+MaybeDate = Annotated[Optional[date], BeforeValidator(_to_opt_date)]
+
+
 # ----- Resource schemas -----
 
 class ResourceBase(BaseModel):
     name: Optional[str] = None
     role: Optional[str] = None
-    skills: Optional[Union[str, List[str]]] = None
+    skills: Optional[Skills] = None
     proficiency_level: Optional[str] = Field(None, description="Beginner|Intermediate|Advanced|Expert")
     capacity_hrs_per_week: Optional[int] = None
     current_commitments: Optional[str] = None
-    availability_date: Optional[Union[str, date]] = None
+    availability_date: MaybeDate = None
     location_timezone: Optional[str] = None
     employment_type: Optional[str] = Field(None, description="Intern|Full-time|Contractor")
     cost_per_hour_inr: Optional[float] = None
 
-    @validator("skills", pre=True)
-    def _norm_skills(cls, v):
-        return _to_list(v)
-
-    @validator("availability_date", pre=True)
-    def _norm_avail(cls, v):
-        return _to_opt_date(v)
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ResourceCreate(ResourceBase):
     resource_id: str
     name: str
     role: str
-    skills: Union[str, List[str]]
+    skills: Skills
 
 
 class ResourceUpdate(ResourceBase):
@@ -597,23 +783,17 @@ class ResourceOut(BaseModel):
 class ProjectBase(BaseModel):
     name: Optional[str] = None
     summary: Optional[str] = None
-    required_skills: Optional[Union[str, List[str]]] = None
+    required_skills: Optional[Skills] = None
     staffing_mix: Optional[str] = None
-    start_date: Optional[Union[str, date]] = None
-    end_date: Optional[Union[str, date]] = None
+    start_date: MaybeDate = None
+    end_date: MaybeDate = None
     milestones: Optional[str] = None
     required_roles: Optional[str] = None
     priority: Optional[str] = Field(None, description="Low|Medium|High")
     budget_inr: Optional[int] = None
     compliance: Optional[str] = None
 
-    @validator("required_skills", pre=True)
-    def _norm_req_skills(cls, v):
-        return _to_list(v)
-
-    @validator("start_date", "end_date", pre=True)
-    def _norm_dates(cls, v):
-        return _to_opt_date(v)
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ProjectCreate(ProjectBase):
@@ -648,12 +828,12 @@ def _resource_to_dict(r: Resource) -> dict:
         "name": r.name,
         "role": r.role,
         "skills": r.skills or [],
-        "proficiency": r.proficiency_level.value if r.proficiency_level else None,
+        "proficiency": r.proficiency_level,
         "capacity": r.capacity_hrs_per_week,
         "commitments": r.current_commitments,
         "availability_date": r.availability_date.isoformat() if r.availability_date else None,
         "timezone": r.location_timezone,
-        "type": r.employment_type.value if r.employment_type else None,
+        "type": r.employment_type,
         "cost_hour": float(r.cost_per_hour_inr) if r.cost_per_hour_inr is not None else None,
     }
 
@@ -682,147 +862,174 @@ def _project_to_dict(p: Project) -> dict:
 # -----------------------------------------------------------------------------
 
 @router.post("/resources", response_model=ResourceOut, summary="Create resource")
-def create_resource(
+async def create_resource(
     body: ResourceCreate,
     conversation_id: str = Query(...),
     user: Optional[str] = Query(default=None),
     x_user_id: Optional[str] = Header(default=None, alias="X-User-ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     # Conflict if the id already exists for this conversation+user
     existing = _filter_by_conversation_and_user(
-        db.query(Resource).filter(Resource.resource_id == body.resource_id),
+        select(Resource).where(Resource.resource_id == body.resource_id),
         Resource, conversation_id, x_user_id, user,
     )
-    if existing.first():
+    if (await db.execute(existing)).scalars().first():
         raise HTTPException(status_code=409, detail="resource_id already exists in this conversation")
 
-    obj = Resource(
+    # Core insert with RETURNING: one statement, no identity-map
+    # book-keeping and no refresh SELECT afterwards
+    stmt = insert(Resource.__table__).values(
         resource_id=body.resource_id.strip(),
         name=body.name.strip(),
         role=body.role.strip(),
         skills=_to_list(body.skills),
-        proficiency_level=_enum_or_none(Proficiency, body.proficiency_level),
+        proficiency_level=_enum_value_or_none(Proficiency, body.proficiency_level),
         capacity_hrs_per_week=body.capacity_hrs_per_week,
         current_commitments=(body.current_commitments or None),
         availability_date=_to_opt_date(body.availability_date),
         location_timezone=(body.location_timezone or None),
-        employment_type=_enum_or_none(EmploymentType, body.employment_type),
+        employment_type=_enum_value_or_none(EmploymentType, body.employment_type),
         cost_per_hour_inr=body.cost_per_hour_inr,
         conversation_id=conversation_id,
         user_id=x_user_id or user or "default",
-    )
-    db.add(obj)
+    ).returning(*Resource.__table__.c)
     try:
-        db.commit()
+        row = (await db.execute(stmt)).first()
+        await db.commit()
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise
-    db.refresh(obj)
-    return _resource_to_dict(obj)
+    return _resource_to_dict(row)
 
-@router.get("/resources", response_model=dict, summary="List resources (paginated)")
-def list_resources(
+@router.get("/resources", response_model=dict, summary="List resources (keyset paginated)")
+async def list_resources(
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(default=None, description="last resource_id of the previous page"),
     name: Optional[str] = Query(default=None, description="substring match"),
-    db: Session = Depends(get_db),
+    include_total: bool = Query(False, description="also compute the filtered total (extra scan)"),
+    db: AsyncSession = Depends(get_db),
 ):
-    q = db.query(Resource)
+    # keyset pagination: resume strictly after the cursor id instead of
+    # rescanning OFFSET rows, and skip the COUNT(*) unless asked for —
+    # with the (conversation, user, id) index each page is O(limit)
+    q = select(Resource)
     if name:
-        q = q.filter(Resource.name.ilike(f"%{name}%"))
-    total = q.count()
-    items = q.order_by(Resource.resource_id).offset(offset).limit(limit).all()
-    return {"total": total, "items": [_resource_to_dict(r) for r in items]}
+        q = q.where(Resource.name.ilike(f"%{name}%"))
+    page_q = q
+    if cursor:
+        page_q = page_q.where(Resource.resource_id > cursor)
+    rows = (await db.execute(page_q.order_by(Resource.resource_id).limit(limit + 1))).scalars().all()
+    items = rows[:limit]
+    out: Dict[str, Any] = {
+        "items": [_resource_to_dict(r) for r in items],
+        "next_cursor": items[-1].resource_id if len(rows) > limit else None,
+    }
+    if include_total:
+        out["total"] = await db.scalar(select(func.count()).select_from(q.subquery()))
+    return out
 
 
 @router.get("/resources/{resource_id}", response_model=ResourceOut, summary="Get one resource")
-def get_resource(
+async def get_resource(
     resource_id: str,
     conversation_id: str = Query(...),
     user: Optional[str] = Query(default=None),
     x_user_id: Optional[str] = Header(default=None, alias="X-User-ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     q = _filter_by_conversation_and_user(
-        db.query(Resource).filter(Resource.resource_id == resource_id),
+        select(Resource).where(Resource.resource_id == resource_id),
         Resource, conversation_id, x_user_id, user,
     )
-    obj = q.first()
+    obj = (await db.execute(q)).scalars().first()
     if not obj:
         raise HTTPException(status_code=404, detail="resource not found")
     return _resource_to_dict(obj)
 
 
 @router.patch("/resources/{resource_id}", response_model=ResourceOut, summary="Update resource (partial)")
-def update_resource(
+async def update_resource(
     resource_id: str,
     body: ResourceUpdate,
     conversation_id: str = Query(...),
     user: Optional[str] = Query(default=None),
     x_user_id: Optional[str] = Header(default=None, alias="X-User-ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    q = _filter_by_conversation_and_user(
-        db.query(Resource).filter(Resource.resource_id == resource_id),
-        Resource, conversation_id, x_user_id, user,
-    )
-    obj = q.first()
-    if not obj:
-        raise HTTPException(status_code=404, detail="resource not found")
-
-    # Apply partial updates
+    # Collect partial updates into one Core UPDATE ... RETURNING; the old
+    # load-mutate-commit-refresh flow cost a SELECT before and after
+    changes: Dict[str, Any] = {}
     if body.name is not None:
-        obj.name = body.name.strip()
+        changes["name"] = body.name.strip()
     if body.role is not None:
-        obj.role = body.role.strip()
+        changes["role"] = body.role.strip()
     if body.skills is not None:
-        obj.skills = _to_list(body.skills)
+        changes["skills"] = _to_list(body.skills)
     if body.proficiency_level is not None:
-        obj.proficiency_level = _enum_or_none(Proficiency, body.proficiency_level)
+        changes["proficiency_level"] = _enum_value_or_none(Proficiency, body.proficiency_level)
     if body.capacity_hrs_per_week is not None:
-        obj.capacity_hrs_per_week = body.capacity_hrs_per_week
+        changes["capacity_hrs_per_week"] = body.capacity_hrs_per_week
     if body.current_commitments is not None:
-        obj.current_commitments = (body.current_commitments or None)
+        changes["current_commitments"] = body.current_commitments or None
     if body.availability_date is not None:
-        obj.availability_date = _to_opt_date(body.availability_date)
+        changes["availability_date"] = _to_opt_date(body.availability_date)
     if body.location_timezone is not None:
-        obj.location_timezone = (body.location_timezone or None)
+        changes["location_timezone"] = body.location_timezone or None
     if body.employment_type is not None:
-        obj.employment_type = _enum_or_none(EmploymentType, body.employment_type)
+        changes["employment_type"] = _enum_value_or_none(EmploymentType, body.employment_type)
     if body.cost_per_hour_inr is not None:
-        obj.cost_per_hour_inr = body.cost_per_hour_inr
+        changes["cost_per_hour_inr"] = body.cost_per_hour_inr
 
+    if not changes:
+        q = _filter_by_conversation_and_user(
+            select(*Resource.__table__.c).where(Resource.resource_id == resource_id),
+            Resource, conversation_id, x_user_id, user,
+        )
+        row = (await db.execute(q)).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="resource not found")
+        return _resource_to_dict(row)
+
+    stmt = _filter_by_conversation_and_user(
+        update(Resource.__table__).where(Resource.resource_id == resource_id),
+        Resource, conversation_id, x_user_id, user,
+    ).values(**changes).returning(*Resource.__table__.c)
     try:
-        db.commit()
+        row = (await db.execute(stmt)).first()
+        if not row:
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="resource not found")
+        await db.commit()
+    except HTTPException:
+        raise
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise
-    db.refresh(obj)
-    return _resource_to_dict(obj)
+    return _resource_to_dict(row)
 
 
 @router.delete("/resources/{resource_id}", response_model=dict, summary="Delete resource")
-def delete_resource(
+async def delete_resource(
     resource_id: str,
     conversation_id: str = Query(...),
     user: Optional[str] = Query(default=None),
     x_user_id: Optional[str] = Header(default=None, alias="X-User-ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    q = _filter_by_conversation_and_user(
-        db.query(Resource).filter(Resource.resource_id == resource_id),
+    # one DELETE, existence checked via rowcount — no SELECT round trip first
+    stmt = _filter_by_conversation_and_user(
+        delete(Resource.__table__).where(Resource.resource_id == resource_id),
         Resource, conversation_id, x_user_id, user,
     )
-    obj = q.first()
-    if not obj:
-        raise HTTPException(status_code=404, detail="resource not found")
-    db.delete(obj)
     try:
-        db.commit()
+        res = await db.execute(stmt)
+        await db.commit()
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise
+    if res.rowcount == 0:
+        raise HTTPException(status_code=404, detail="resource not found")
     return {"ok": True}
 
 
@@ -831,21 +1038,21 @@ def delete_resource(
 # -----------------------------------------------------------------------------
 
 @router.post("/projects", response_model=ProjectOut, summary="Create project")
-def create_project(
+async def create_project(
     body: ProjectCreate,
     conversation_id: str = Query(...),
     user: Optional[str] = Query(default=None),
     x_user_id: Optional[str] = Header(default=None, alias="X-User-ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     existing = _filter_by_conversation_and_user(
-        db.query(Project).filter(Project.project_id == body.project_id),
+        select(Project).where(Project.project_id == body.project_id),
         Project, conversation_id, x_user_id, user,
     )
-    if existing.first():
+    if (await db.execute(existing)).scalars().first():
         raise HTTPException(status_code=409, detail="project_id already exists in this conversation")
 
-    obj = Project(
+    stmt = insert(Project.__table__).values(
         project_id=body.project_id.strip(),
         name=body.name.strip(),
         summary=(body.summary or None),
@@ -855,128 +1062,185 @@ def create_project(
         end_date=_to_opt_date(body.end_date),
         milestones=(body.milestones or None),
         required_roles=(body.required_roles or None),
-        priority=_enum_or_none(Priority, body.priority),
+        priority=_enum_value_or_none(Priority, body.priority),
         budget_inr=body.budget_inr,
         compliance=(body.compliance or None),
         conversation_id=conversation_id,
         user_id=x_user_id or user or "default",
-    )
-    db.add(obj)
+    ).returning(*Project.__table__.c)
     try:
-        db.commit()
+        row = (await db.execute(stmt)).first()
+        await db.commit()
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise
-    db.refresh(obj)
-    return _project_to_dict(obj)
+    return _project_to_dict(row)
 
 
 @router.get("/projects", response_model=dict, summary="List projects (paginated, simple)")
-def list_projects(
+async def list_projects(
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
     name: Optional[str] = Query(default=None, description="substring match"),
     priority: Optional[str] = Query(default=None, description="e.g., High/Medium/Low"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+):
+    filters = []
+    if name:
+        filters.append(Project.name.ilike(f"%{name}%"))
+    if priority:
+        enum_val = _enum_value_or_none(Priority, priority)
+        if enum_val is not None:
+            filters.append(Project.priority == enum_val)
+
+    # one round trip: the window count rides along with the page rows.
+    # Selecting raw columns instead of the Project entity skips the ORM
+    # identity map and per-row instance construction entirely — the rows
+    # are plain tuples the dict mapper reads by attribute, so lazy loads
+    # can't even exist on this path.
+    stmt = (
+        select(*Project.__table__.c, func.count().over().label("total"))
+        .where(*filters)
+        .order_by(Project.name.asc())
+        .offset(offset)
+        .limit(limit)
+    )
+    rows = (await db.execute(stmt)).all()
+    if rows:
+        total = rows[0].total
+    else:
+        # page past the end of the result set: fall back to a bare count
+        total = await db.scalar(select(func.count()).select_from(Project).where(*filters))
+    return {"total": total, "items": [_project_to_dict(row) for row in rows]}
+
+
+@router.get(
+    "/projects.jsonl",
+    summary="Stream all projects as NDJSON",
+    description="Line-delimited JSON for server-to-server bulk fetches; rows stream as they arrive instead of buffering the whole result set.",
+)
+async def stream_projects(
+    name: Optional[str] = Query(default=None, description="substring match"),
+    priority: Optional[str] = Query(default=None, description="e.g., High/Medium/Low"),
+    db: AsyncSession = Depends(get_db),
 ):
-    q = db.query(Project)
+    filters = []
     if name:
-        q = q.filter(Project.name.ilike(f"%{name}%"))
+        filters.append(Project.name.ilike(f"%{name}%"))
     if priority:
-        enum_val = _enum_or_none(Priority, priority)
+        enum_val = _enum_value_or_none(Priority, priority)
         if enum_val is not None:
-            q = q.filter(Project.priority == enum_val)
+            filters.append(Project.priority == enum_val)
+
+    stmt = select(*Project.__table__.c).where(*filters).order_by(Project.name.asc())
+    # server-side cursor in 100-row batches: serialization overlaps the
+    # network send and peak memory stays at one batch, not the whole table
+    result = await db.stream(stmt.execution_options(yield_per=100))
+
+    async def gen():
+        async for row in result:
+            yield orjson.dumps(_project_to_dict(row), option=orjson.OPT_APPEND_NEWLINE)
 
-    total = q.count()
-    items = q.order_by(Project.name.asc()).offset(offset).limit(limit).all()
-    return {"total": total, "items": [_project_to_dict(p) for p in items]}
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
 
 @router.get("/projects/{project_id}", response_model=ProjectOut, summary="Get one project")
-def get_project(
+async def get_project(
     project_id: str,
     conversation_id: str = Query(...),
     user: Optional[str] = Query(default=None),
     x_user_id: Optional[str] = Header(default=None, alias="X-User-ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     q = _filter_by_conversation_and_user(
-        db.query(Project).filter(Project.project_id == project_id),
+        select(Project).options(raiseload("*")).where(Project.project_id == project_id),
         Project, conversation_id, x_user_id, user,
     )
-    obj = q.first()
+    obj = (await db.execute(q)).scalars().first()
     if not obj:
         raise HTTPException(status_code=404, detail="project not found")
     return _project_to_dict(obj)
 
 
 @router.patch("/projects/{project_id}", response_model=ProjectOut, summary="Update project (partial)")
-def update_project(
+async def update_project(
     project_id: str,
     body: ProjectUpdate,
     conversation_id: str = Query(...),
     user: Optional[str] = Query(default=None),
     x_user_id: Optional[str] = Header(default=None, alias="X-User-ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    q = _filter_by_conversation_and_user(
-        db.query(Project).filter(Project.project_id == project_id),
-        Project, conversation_id, x_user_id, user,
-    )
-    obj = q.first()
-    if not obj:
-        raise HTTPException(status_code=404, detail="project not found")
-
+    changes: Dict[str, Any] = {}
     if body.name is not None:
-        obj.name = body.name.strip()
+        changes["name"] = body.name.strip()
     if body.summary is not None:
-        obj.summary = (body.summary or None)
+        changes["summary"] = body.summary or None
     if body.required_skills is not None:
-        obj.required_skills = _to_list(body.required_skills)
+        changes["required_skills"] = _to_list(body.required_skills)
     if body.staffing_mix is not None:
-        obj.staffing_mix = (body.staffing_mix or None)
+        changes["staffing_mix"] = body.staffing_mix or None
     if body.start_date is not None:
-        obj.start_date = _to_opt_date(body.start_date)
+        changes["start_date"] = _to_opt_date(body.start_date)
     if body.end_date is not None:
-        obj.end_date = _to_opt_date(body.end_date)
+        changes["end_date"] = _to_opt_date(body.end_date)
     if body.milestones is not None:
-        obj.milestones = (body.milestones or None)
+        changes["milestones"] = body.milestones or None
     if body.required_roles is not None:
-        obj.required_roles = (body.required_roles or None)
+        changes["required_roles"] = body.required_roles or None
     if body.priority is not None:
-        obj.priority = _enum_or_none(Priority, body.priority)
+        changes["priority"] = _enum_value_or_none(Priority, body.priority)
     if body.budget_inr is not None:
-        obj.budget_inr = body.budget_inr
+        changes["budget_inr"] = body.budget_inr
     if body.compliance is not None:
-        obj.compliance = (body.compliance or None)
+        changes["compliance"] = body.compliance or None
+
+    if not changes:
+        q = _filter_by_conversation_and_user(
+            select(*Project.__table__.c).where(Project.project_id == project_id),
+            Project, conversation_id, x_user_id, user,
+        )
+        row = (await db.execute(q)).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="project not found")
+        return _project_to_dict(row)
 
+    stmt = _filter_by_conversation_and_user(
+        update(Project.__table__).where(Project.project_id == project_id),
+        Project, conversation_id, x_user_id, user,
+    ).values(**changes).returning(*Project.__table__.c)
     try:
-        db.commit()
+        row = (await db.execute(stmt)).first()
+        if not row:
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="project not found")
+        await db.commit()
+    except HTTPException:
+        raise
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise
-    db.refresh(obj)
-    return _project_to_dict(obj)
+    return _project_to_dict(row)
 
 
 @router.delete("/projects/{project_id}", response_model=dict, summary="Delete project")
-def delete_project(
+async def delete_project(
     project_id: str,
     conversation_id: str = Query(...),
     user: Optional[str] = Query(default=None),
     x_user_id: Optional[str] = Header(default=None, alias="X-User-ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    q = _filter_by_conversation_and_user(
-        db.query(Project).filter(Project.project_id == project_id),
+    # one DELETE, existence checked via rowcount — no SELECT round trip first
+    stmt = _filter_by_conversation_and_user(
+        delete(Project.__table__).where(Project.project_id == project_id),
         Project, conversation_id, x_user_id, user,
     )
-    obj = q.first()
-    if not obj:
-        raise HTTPException(status_code=404, detail="project not found")
-    db.delete(obj)
     try:
-        db.commit()
+        res = await db.execute(stmt)
+        await db.commit()
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise
+    if res.rowcount == 0:
+        raise HTTPException(status_code=404, detail="project not found")
     return {"ok": True}
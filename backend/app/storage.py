@@ -1,16 +1,25 @@
 from __future__ import annotations
 
+import fcntl
+import functools
+import hashlib
 import json
+import os
+import threading
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import msgspec
+import orjson
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import List
 
 from fastapi import HTTPException
-from filelock import FileLock
-
-from .config import CONV_DIR, ID_RE, USER_RE, DEFAULT_USER
-from .models import ConversationSummary, MessageOut
+from .config import CONV_DIR, USER_RE, DEFAULT_USER, valid_cid
+from .models import ConversationSummary, MessageOut, Role
 
 def _utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -21,16 +30,36 @@ def _validate_user(user_id: str | None) -> str:
         raise HTTPException(status_code=422, detail="invalid user id")
     return user_id
 
-def _user_dir(user_id: str) -> Path:
-    uid = _validate_user(user_id)
+# resolve() is a realpath syscall and mkdir another two; for a given user
+# the answer never changes, so pay them once per process, not per request.
+@functools.lru_cache(maxsize=4096)
+def _user_dir_cached(uid: str) -> Path:
     p = (CONV_DIR / uid).resolve()
     p.mkdir(parents=True, exist_ok=True)
     return p
 
+def _user_dir(user_id: str) -> Path:
+    return _user_dir_cached(_validate_user(user_id))
+
+# the filename is validated hex under an already-resolved directory, so the
+# joined Path needs no second realpath and is identical per (uid, cid).
+# Conversations shard into 256 two-hex-char subdirectories so a heavy
+# user's directory never grows into the readdir-bound range; files that
+# predate sharding are found at their flat legacy location.
+@functools.lru_cache(maxsize=8192)
+def _conv_path_cached(uid: str, cid: str) -> Path:
+    udir = _user_dir_cached(uid)
+    legacy = udir / f"{cid}.jsonl"
+    if legacy.exists():
+        return legacy
+    shard = udir / cid[:2]
+    shard.mkdir(exist_ok=True)
+    return shard / f"{cid}.jsonl"
+
 def _conv_path(user_id: str, cid: str) -> Path:
-    if not ID_RE.match(cid):
+    if not valid_cid(cid):
         raise HTTPException(status_code=422, detail="conversation_id must be uuid hex (32 chars)")
-    return (_user_dir(user_id) / f"{cid.lower()}.jsonl").resolve()
+    return _conv_path_cached(_validate_user(user_id), cid.lower())
 
 def _ensure_exists(path: Path) -> None:
     if not path.exists():
@@ -39,40 +68,227 @@ def _ensure_exists(path: Path) -> None:
 def _mtime_iso(path: Path) -> str:
     return datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc).isoformat()
 
+# Read buffer for whole-file scans; 1 MiB keeps the line iterator out of
+# per-4KiB read() syscalls on multi-MB conversations.
+_SCAN_BUFFER = 1 << 20
+
+# msgspec decodes straight into a typed struct in C — no intermediate dict,
+# no per-field Python-level validation dispatch. One module-level decoder so
+# the schema is compiled once.
+class _Message(msgspec.Struct):
+    role: str
+    content: str
+    ts: str
+
+_DEC = msgspec.json.Decoder(_Message)
+
+# str -> Role member without the enum __call__ machinery per line
+_ROLE_MAP = {m.value: m for m in Role}
+
+# default-arg bindings turn the per-line global/attribute lookups into
+# local loads — this function runs once per line of every read
+def _parse_line(
+    line,
+    _decode=_DEC.decode,
+    _role_get=_ROLE_MAP.get,
+    _construct=MessageOut.model_construct,
+    _decode_error=msgspec.DecodeError,
+) -> MessageOut | None:
+    """One JSONL record -> MessageOut, or None for blank/malformed lines."""
+    try:
+        m = _decode(line)
+    except _decode_error:
+        return None
+    role = _role_get(m.role)
+    if role is None:
+        return None
+    # the struct already guarantees the field types; model_construct skips
+    # pydantic's validation pass on the hot read loop
+    return _construct(role=role, content=m.content, ts=m.ts)
+
 def read_all_valid_messages(path: Path) -> List[MessageOut]:
-    msgs: List[MessageOut] = []
+    # list comprehension: the iteration/append machinery runs as a single
+    # specialized bytecode loop rather than interpreted statement-by-statement
+    parse = _parse_line
     try:
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    obj = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-                role, content, ts = obj.get("role"), obj.get("content"), obj.get("ts")
-                if role in {"system", "user", "assistant"} and isinstance(content, str) and isinstance(ts, str):
-                    msgs.append(MessageOut(role=role, content=content, ts=ts))
+        with open(path, "rb", buffering=_SCAN_BUFFER) as f:
+            return [m for line in f if (m := parse(line)) is not None]
     except FileNotFoundError:
+        return []
+
+# --- message-count sidecar -------------------------------------------------
+# `{cid}.count` holds "mtime_ns:size:count" for the JSONL file so neither
+# pagination math nor conversation summaries rescan the whole file. The
+# recorded stat pair makes the entry self-validating: if the file changed
+# behind our back (crash mid-append, manual edit) the stat no longer
+# matches and we fall back to a raw newline count. Only this module writes
+# the JSONL files, so line count == message count. The sidecar is rewritten
+# under the same append lock (entry threading.Lock + kernel flock).
+
+def _count_path(path: Path) -> Path:
+    return path.with_suffix(".count")
+
+def _count_lines(path: Path) -> int:
+    n = 0
+    with open(path, "rb", buffering=_SCAN_BUFFER) as f:
+        for chunk in iter(lambda: f.read(_SCAN_BUFFER), b""):
+            n += chunk.count(b"\n")
+    return n
+
+def _read_count(path: Path) -> int:
+    """Message count, served from the sidecar when its recorded stat still
+    matches the file; otherwise one streaming recount."""
+    try:
+        mtime_ns, size, count = map(int, _count_path(path).read_text().split(":"))
+        st = path.stat()
+        if st.st_mtime_ns == mtime_ns and st.st_size == size:
+            return count
+    except (FileNotFoundError, ValueError):
         pass
-    return msgs
+    # Recount without repairing the sidecar: we don't hold the lock here,
+    # and the next append rewrites it anyway.
+    return _count_lines(path)
+
+def _rewrite_meta(path: Path, count: int) -> None:
+    """Record the current stat + count. Caller must hold the conversation
+    lock and pass the count matching the file as it stands now."""
+    st = path.stat()
+    _count_path(path).write_text(f"{st.st_mtime_ns}:{st.st_size}:{count}")
+
+# --- append fd cache -------------------------------------------------------
+# Appending used to open a separate .lock file (filelock), open the JSONL,
+# write, flush and close — a dozen syscalls per message. Instead keep one
+# O_APPEND descriptor per conversation in a small LRU and do a single
+# os.write() per append. Exclusion is kernel-side: fcntl.flock on the data
+# fd covers other worker processes, and a per-entry threading.Lock covers
+# threads in this process (flock can't — they share the open file
+# description). The sidecar bookkeeping needs that exclusion, which is why
+# even sub-PIPE_BUF writes take the (uncontended, in-kernel) flock.
+
+_FD_CACHE: "OrderedDict[str, tuple[int, threading.Lock]]" = OrderedDict()
+_FD_CACHE_MAX = 128
+_FD_CACHE_LOCK = threading.Lock()
+
+def _append_entry(path: Path) -> tuple[int, threading.Lock]:
+    """Cached (fd, lock) for `path`. Raises FileNotFoundError if the
+    conversation doesn't exist — deliberately no O_CREAT, so an append
+    racing a delete cannot resurrect the file (create_conversation is the
+    only place that creates it)."""
+    key = str(path)
+    with _FD_CACHE_LOCK:
+        entry = _FD_CACHE.get(key)
+        if entry is not None:
+            _FD_CACHE.move_to_end(key)
+            return entry
+        fd = os.open(key, os.O_WRONLY | os.O_APPEND)
+        entry = (fd, threading.Lock())
+        _FD_CACHE[key] = entry
+        if len(_FD_CACHE) > _FD_CACHE_MAX:
+            _, (old_fd, _unused) = _FD_CACHE.popitem(last=False)
+            os.close(old_fd)
+        return entry
+
+def _evict_stale(path: Path, fd: int) -> None:
+    """Drop the cache entry for `path` if it still maps to `fd`.
+
+    The fd is deliberately not closed here: on every path that calls this
+    it is either already closed, or its number may have been recycled to
+    an unrelated open file, so closing it would be someone else's bug."""
+    key = str(path)
+    with _FD_CACHE_LOCK:
+        entry = _FD_CACHE.get(key)
+        if entry is not None and entry[0] == fd:
+            del _FD_CACHE[key]
+
+# --- conversation tail cache -----------------------------------------------
+# Chat UIs poll the newest page (`offset=0`) of the conversation they have
+# open, so keep the last _TAIL_KEEP parsed messages of recently touched
+# conversations in memory, keyed by the same (mtime_ns, size) fingerprint
+# the count sidecar uses. A fresh entry serves the page with zero file I/O;
+# appends extend the cached tail in place instead of invalidating it.
+# Entries are (mtime_ns, size, total, tail) with tail oldest -> newest.
+
+_TAIL_KEEP = 50
+_TAIL_CACHE: "OrderedDict[str, tuple[int, int, int, List[MessageOut]]]" = OrderedDict()
+_TAIL_CACHE_MAX = 512
+_TAIL_CACHE_LOCK = threading.Lock()
+
+def _tail_store(key: str, st: os.stat_result, total: int, tail: List[MessageOut]) -> None:
+    with _TAIL_CACHE_LOCK:
+        _TAIL_CACHE[key] = (st.st_mtime_ns, st.st_size, total, tail)
+        _TAIL_CACHE.move_to_end(key)
+        if len(_TAIL_CACHE) > _TAIL_CACHE_MAX:
+            _TAIL_CACHE.popitem(last=False)
+
+def _tail_evict(path: Path) -> None:
+    with _TAIL_CACHE_LOCK:
+        _TAIL_CACHE.pop(str(path), None)
+
+def _append_payload(path: Path, payload: bytes, records: List[MessageOut]) -> None:
+    """Append pre-encoded JSONL lines in one write, meta kept in step.
+
+    Two attempts: a cached descriptor goes stale when a delete closes it
+    while this thread is waiting on the entry lock; the retry reopens from
+    the path, which 404s if the conversation is gone."""
+    for _ in range(2):
+        try:
+            fd, thread_lock = _append_entry(path)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        stale = False
+        with thread_lock:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except OSError:
+                stale = True  # closed while we waited for the entry lock
+            if not stale:
+                try:
+                    try:
+                        prev_st = path.stat()
+                    except FileNotFoundError:
+                        # deleted while this (or another) process still held a
+                        # cached descriptor — nothing must land on the dead inode
+                        _evict_stale(path, fd)
+                        raise HTTPException(status_code=404, detail="Conversation not found")
+                    if os.fstat(fd).st_ino != prev_st.st_ino:
+                        stale = True  # descriptor predates a swap of the file
+                    else:
+                        prev = _read_count(path)  # validated against the pre-append stat
+                        os.write(fd, payload)
+                        _rewrite_meta(path, prev + len(records))
+                        st = path.stat()
+                finally:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_UN)
+                    except OSError:
+                        pass
+        if not stale:
+            break
+        _evict_stale(path, fd)
+    else:
+        # two stale descriptors in a row — the conversation is going away
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    key = str(path)
+    with _TAIL_CACHE_LOCK:
+        entry = _TAIL_CACHE.get(key)
+        if entry is not None:
+            if entry[0] == prev_st.st_mtime_ns and entry[1] == prev_st.st_size:
+                # still hold the write exclusivity window's result: roll the
+                # cached tail forward instead of throwing it away
+                tail = (entry[3] + records)[-_TAIL_KEEP:]
+                _TAIL_CACHE[key] = (st.st_mtime_ns, st.st_size, prev + len(records), tail)
+            else:
+                del _TAIL_CACHE[key]
 
 def summarize_conversation(path: Path) -> ConversationSummary:
-    cid = path.stem
-    last_at = _mtime_iso(path)
-    count = 0
     try:
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    json.loads(line)
-                    count += 1
-                except json.JSONDecodeError:
-                    continue
+        last_at = _mtime_iso(path)
+        # stat-validated sidecar hit in the common case — summarizing a
+        # conversation costs two stat calls, not a full file scan
+        count = _read_count(path)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    return ConversationSummary(id=cid, last_at=last_at, count=count)
+    return ConversationSummary(id=path.stem, last_at=last_at, count=count)
 
 # Public API (per-user)
 def create_conversation(user_id: str | None) -> str:
@@ -83,58 +299,206 @@ def create_conversation(user_id: str | None) -> str:
         pass
     return cid
 
+# Shared pool for summarizing a listing page and scanning shard
+# directories; a per-request executor would pay thread spawn cost on
+# every call.
+_SUMMARY_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="conv-summary")
+
+def _scan_shard(dirpath: str) -> list:
+    """(mtime_ns, cid) sort keys + paths for every conversation in a shard."""
+    out = []
+    try:
+        with os.scandir(dirpath) as it:
+            for e in it:
+                if e.name.endswith(".jsonl") and e.is_file():
+                    out.append(((e.stat().st_mtime_ns, e.name[:-6]), Path(e.path)))
+    except FileNotFoundError:
+        pass
+    return out
+
 def delete_conversation(user_id: str | None, cid: str) -> None:
     path = _conv_path(_validate_user(user_id), cid)
     _ensure_exists(path)
-    lock = FileLock(str(path) + ".lock")
-    with lock:
+    # Exclude concurrent appenders with the same locks they take: the cached
+    # entry's threading.Lock in-process plus the kernel flock across
+    # processes. A separate lockfile would exclude neither. Appenders that
+    # get in after the unlink see the stat fail and 404 instead of writing
+    # to the dead inode.
+    try:
+        fd, thread_lock = _append_entry(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    with thread_lock:
         try:
-            path.unlink()
-        except FileNotFoundError:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except OSError:
+            # a concurrent delete won the race and already closed this fd
+            _evict_stale(path, fd)
             raise HTTPException(status_code=404, detail="Conversation not found")
+        try:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                raise HTTPException(status_code=404, detail="Conversation not found")
+            _count_path(path).unlink(missing_ok=True)
+            _tail_evict(path)
+        finally:
+            # closing releases the flock too; safe while the entry lock is
+            # held — no other thread can be mid-syscall on this fd
+            _evict_stale(path, fd)
+            os.close(fd)
+
+def list_conversations(
+    user_id: str | None, limit: int, before: tuple | None = None
+) -> tuple:
+    """List conversations newest-first with keyset pagination.
 
-def list_conversations(user_id: str | None, limit: int) -> List[ConversationSummary]:
+    `before` is the (mtime_ns, cid) key of the last item of the previous
+    page; only strictly older entries are returned. Returns the page plus
+    the cursor for the next page (None when this page is the last), so
+    deep pages don't re-summarize everything that came before them.
+    """
     udir = _user_dir(_validate_user(user_id))
-    files = sorted(
-        (p for p in udir.glob("*.jsonl") if p.is_file()),
-        key=lambda p: p.stat().st_mtime,
-        reverse=True,
-    )
-    return [summarize_conversation(p) for p in files[:limit]]
+    keyed = []
+    shards = []
+    # scandir hands back DirEntry objects with the file type from the
+    # directory read and a cached stat(), where glob + per-Path stat() +
+    # is_file() cost two extra syscalls per file
+    with os.scandir(udir) as it:
+        for e in it:
+            if e.name.endswith(".jsonl") and e.is_file():
+                # flat file from before sharding
+                keyed.append(((e.stat().st_mtime_ns, e.name[:-6]), Path(e.path)))
+            elif len(e.name) == 2 and e.is_dir():
+                shards.append(e.path)
+    # shard directories are independent getdents passes — overlap them
+    if len(shards) > 1:
+        for part in _SUMMARY_POOL.map(_scan_shard, shards):
+            keyed.extend(part)
+    elif shards:
+        keyed.extend(_scan_shard(shards[0]))
+    if before is not None:
+        b = tuple(before)
+        keyed = [kp for kp in keyed if kp[0] < b]
+    keyed.sort(key=lambda e: e[0], reverse=True)
+    page = keyed[:limit]
+    next_cursor = page[-1][0] if len(keyed) > limit else None
+    if len(page) <= 4:
+        return [summarize_conversation(p) for _, p in page], next_cursor
+    # Summaries are independent blocking I/O (stat hits in the common case,
+    # full recounts for files changed outside an append); fan them out so
+    # the page costs max-of-latencies instead of sum-of-latencies.
+    return list(_SUMMARY_POOL.map(summarize_conversation, (p for _, p in page))), next_cursor
 
-def get_conversation(user_id: str | None, cid: str) -> ConversationSummary:
+def conversation_etag(user_id: str | None, cid: str) -> str:
+    """Cheap content fingerprint for conditional GETs: appends only ever
+    grow the file and bump its mtime, so (mtime_ns, size) changes iff the
+    conversation changed — no need to read the file itself."""
     path = _conv_path(_validate_user(user_id), cid)
     _ensure_exists(path)
-    return summarize_conversation(path)
+    st = path.stat()
+    return hashlib.blake2b(
+        f"{st.st_mtime_ns}:{st.st_size}".encode(), digest_size=8
+    ).hexdigest()
 
-# storage.py
-def append_message(user_id: str | None, cid: str, role: str, content: str) -> MessageOut:
+def get_conversation(user_id: str | None, cid: str) -> ConversationSummary:
     path = _conv_path(_validate_user(user_id), cid)
-    if not path.exists():
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    _ensure_exists(path)
+    return summarize_conversation(path)
 
-    # NEW: coerce to string safely
+def _coerce_content(content) -> str:
+    # coerce to string safely
     if not isinstance(content, str):
         try:
             content = json.dumps(content, ensure_ascii=False)
         except Exception:
             content = str(content)
-
     content = content.strip()
     if not content:
         raise HTTPException(status_code=422, detail="content must be non-empty")
+    return content
+
+# storage.py
+def append_message(user_id: str | None, cid: str, role: str, content: str) -> MessageOut:
+    path = _conv_path(_validate_user(user_id), cid)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Conversation not found")
 
+    content = _coerce_content(content)
     record = MessageOut(role=role, content=content, ts=_utc_iso())
-    # ... keep the rest unchanged ...
+    # orjson emits bytes directly and appends the newline in the same C
+    # call — no str concatenation or encode step on the hot path. The
+    # literal dict skips pydantic's .dict() model walk for three fields.
+    payload = orjson.dumps(
+        {"role": record.role, "content": record.content, "ts": record.ts},
+        option=orjson.OPT_APPEND_NEWLINE,
+    )
+    _append_payload(path, payload, [record])
+    return record
 
+def append_messages(user_id: str | None, cid: str, items: List[tuple]) -> List[MessageOut]:
+    """Append several messages under a single lock/open cycle.
 
-def get_messages(user_id: str | None, cid: str, limit: int, offset: int) -> List[MessageOut]:
+    `items` is a list of (role, content) pairs. The chat hot path writes the
+    user question and the assistant answer together, so batching them turns
+    two lock acquisitions and two appends into one of each.
+    """
     path = _conv_path(_validate_user(user_id), cid)
     _ensure_exists(path)
-    messages = read_all_valid_messages(path)  # oldest → newest
-    n = len(messages)
-    start = max(0, n - (offset + limit))
-    end = max(0, n - offset)
-    if start > end:
+    ts = _utc_iso()
+    records = [
+        MessageOut(role=role, content=_coerce_content(content), ts=ts)
+        for role, content in items
+    ]
+    payload = b"".join(
+        orjson.dumps(
+            {"role": r.role, "content": r.content, "ts": r.ts},
+            option=orjson.OPT_APPEND_NEWLINE,
+        )
+        for r in records
+    )
+    _append_payload(path, payload, records)
+    return records
+
+
+def get_messages(user_id: str | None, cid: str, limit: int, offset: int) -> List[MessageOut]:
+    """Return a window of messages (oldest -> newest), `offset` counted from
+    the tail. Only lines inside the window are JSON-parsed; everything before
+    it is skipped as raw bytes, so a deep conversation costs O(limit) parse
+    and allocation rather than O(total)."""
+    path = _conv_path(_validate_user(user_id), cid)
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    key = str(path)
+    want = offset + limit
+    with _TAIL_CACHE_LOCK:
+        entry = _TAIL_CACHE.get(key)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            _mt, _sz, total, tail = entry
+            # serve from memory when the window lies inside the cached tail
+            # (or the tail is the whole conversation) — zero file I/O
+            if want <= len(tail) or len(tail) == total:
+                _TAIL_CACHE.move_to_end(key)
+                end = len(tail) - offset
+                if end <= 0:
+                    return []
+                return tail[max(0, len(tail) - want):end]
+
+    total = _read_count(path)
+    start = max(0, total - want)
+    end = max(0, total - offset)
+    if start >= end:
         return []
-    return messages[start:end]
+    parse = _parse_line
+    with open(path, "rb", buffering=_SCAN_BUFFER) as f:
+        # islice skips the pre-window lines inside the C iterator instead
+        # of a Python-level index check per line
+        msgs = [m for line in islice(f, start, end) if (m := parse(line)) is not None]
+    # a tail-page read doubles as the cache fill, but only when it actually
+    # covered the last _TAIL_KEEP messages (or the whole file)
+    if offset == 0 and (start == 0 or len(msgs) >= _TAIL_KEEP):
+        _tail_store(key, st, total, msgs[-_TAIL_KEEP:])
+    return msgs
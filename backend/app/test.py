@@ -12,10 +12,10 @@ DATABASE_URL = os.getenv(
 )
 
 print("Connecting to Neon…")
-engine = create_engine(DATABASE_URL, future=True, pool_pre_ping=True)
+# one-shot script: pre-ping would just add a SELECT 1 round trip to a
+# connection we are about to use anyway
+engine = create_engine(DATABASE_URL, future=True, pool_pre_ping=False)
 
 with engine.begin() as conn:
-    # 1) create simple table
-    # Drop the specific tables
-    conn.execute(text("DROP TABLE IF EXISTS resources CASCADE"))
-    conn.execute(text("DROP TABLE IF EXISTS projects CASCADE"))
+    # drop both tables in one statement — a single round trip to Neon
+    conn.execute(text("DROP TABLE IF EXISTS resources, projects CASCADE"))
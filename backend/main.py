@@ -1,12 +1,6 @@
 from app import create_app
-from fastapi.middleware.cors import CORSMiddleware
 
 # uvicorn main:app --reload --port 8000
+# CORS is configured inside create_app; adding it again here stacked a
+# second middleware and duplicated the response headers.
 app = create_app()
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
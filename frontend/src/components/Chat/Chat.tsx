@@ -165,31 +165,47 @@ export default function Dashboard({ user }: { user: User }) {
         headers: { ...headers, "Content-Type": "application/json" },
         body: JSON.stringify({ question: q }),
       });
-      if (!r.ok) throw new Error("error talking to AI");
+      if (!r.ok || !r.body) throw new Error("error talking to AI");
 
-      const { answer } = await r.json();
-
-      // parse, set result, and avoid dumping raw JSON into chat
-      const parsed = JSON.parse(
-        JSON.parse(answer)
-          .output.replaceAll("```json", "")
-          .replaceAll("```", "")
-      );
-      console.log(parsed);
-      if (parsed && Array.isArray(parsed.Allocations)) {
-        setResult(parsed);
+      // the backend streams the answer as plain text; render it into the
+      // "Thinking..." bubble as chunks arrive
+      const reader = r.body.getReader();
+      const decoder = new TextDecoder();
+      let answer = "";
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        answer += decoder.decode(value, { stream: true });
+        const soFar = answer;
         setMessages((m) => [
-          ...m,
-          { role: "assistant", content: "Check right →" },
+          ...m.slice(0, -1),
+          { role: "assistant", content: soFar },
         ]);
-      } else {
-        // no structured result; just show the plain text
-        setMessages((m) => [...m, { role: "assistant", content: answer }]);
+      }
+      answer += decoder.decode();
+
+      // parse, set result, and avoid dumping raw JSON into chat
+      try {
+        const parsed = JSON.parse(
+          JSON.parse(answer)
+            .output.replaceAll("```json", "")
+            .replaceAll("```", "")
+        );
+        console.log(parsed);
+        if (parsed && Array.isArray(parsed.Allocations)) {
+          setResult(parsed);
+          setMessages((m) => [
+            ...m.slice(0, -1),
+            { role: "assistant", content: "Check right →" },
+          ]);
+        }
+      } catch {
+        // no structured result; the streamed plain text already shows
       }
     } catch (err: any) {
       console.error(err);
       setMessages((m) => [
-        ...m,
+        ...m.slice(0, -1),
         { role: "assistant", content: "(error talking to AI)" },
       ]);
     } finally {